@@ -0,0 +1,88 @@
+from collections import defaultdict
+from typing import Any, Iterable
+
+
+def alert_states(feature: dict) -> set[str]:
+    """Two-letter state/area codes an alert applies to, taken from its UGC zone codes (e.g. CAZ041 -> CA)."""
+    return {code[:2] for code in alert_zones(feature)}
+
+
+def alert_zones(feature: dict) -> set[str]:
+    return set(feature["properties"].get("geocode", {}).get("UGC", []))
+
+
+class AlertIndex:
+    """In-memory index of the national active-alert feed.
+
+    `apply` takes the full current feed and diffs it against the index by alert ID,
+    so only new, changed and expired alerts touch the per-state, per-zone, per-severity
+    and per-event indexes. Queries are then plain set lookups.
+    """
+
+    def __init__(self):
+        self._alerts: dict[str, dict] = {}
+        self._by_state: defaultdict[str, set[str]] = defaultdict(set)
+        self._by_zone: defaultdict[str, set[str]] = defaultdict(set)
+        self._by_severity: defaultdict[str, set[str]] = defaultdict(set)
+        self._by_event: defaultdict[str, set[str]] = defaultdict(set)
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def apply(self, features: Iterable[dict]) -> set[str]:
+        """Replace the indexed alerts with `features`; return the states whose alerts changed."""
+        current = {feature["id"]: feature for feature in features}
+        changed_states: set[str] = set()
+
+        for alert_id in self._alerts.keys() - current.keys():
+            changed_states |= self._remove(alert_id)
+
+        for alert_id, feature in current.items():
+            existing = self._alerts.get(alert_id)
+            if existing is not None:
+                if existing["properties"] == feature["properties"]:
+                    continue
+                changed_states |= self._remove(alert_id)
+            changed_states |= self._add(alert_id, feature)
+
+        self.loaded = True
+        return changed_states
+
+    def query(self, state: str | None = None, zone: str | None = None,
+              severity: str | None = None, event: str | None = None) -> list[dict]:
+        """Return alerts matching every given filter (case-insensitive)."""
+        selected: set[str] | None = None
+        for index, value in ((self._by_state, state), (self._by_zone, zone),
+                             (self._by_severity, severity), (self._by_event, event)):
+            if value is None:
+                continue
+            ids = index.get(value.lower(), set())
+            selected = ids.copy() if selected is None else selected & ids
+        if selected is None:
+            selected = set(self._alerts)
+        return [self._alerts[alert_id] for alert_id in sorted(selected)]
+
+    def _add(self, alert_id: str, feature: dict) -> set[str]:
+        states = alert_states(feature)
+        self._alerts[alert_id] = feature
+        for key, index in self._keys(feature, states):
+            index[key].add(alert_id)
+        return states
+
+    def _remove(self, alert_id: str) -> set[str]:
+        feature = self._alerts.pop(alert_id)
+        states = alert_states(feature)
+        for key, index in self._keys(feature, states):
+            index[key].discard(alert_id)
+            if not index[key]:
+                del index[key]
+        return states
+
+    def _keys(self, feature: dict, states: set[str]) -> list[tuple[str, defaultdict[str, set[str]]]]:
+        props: dict[str, Any] = feature["properties"]
+        keys = [(state.lower(), self._by_state) for state in states]
+        keys += [(zone.lower(), self._by_zone) for zone in alert_zones(feature)]
+        keys.append((str(props.get("severity", "Unknown")).lower(), self._by_severity))
+        keys.append((str(props.get("event", "Unknown")).lower(), self._by_event))
+        return keys
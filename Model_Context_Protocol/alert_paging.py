@@ -0,0 +1,57 @@
+import base64
+import heapq
+import json
+from typing import Iterable
+
+# Most severe / most urgent first; anything else sorts after these
+SEVERITY_ORDER = ("Extreme", "Severe", "Moderate", "Minor")
+URGENCY_ORDER = ("Immediate", "Expected", "Future", "Past")
+
+
+def _rank(value: str | None, order: tuple[str, ...]) -> int:
+    return order.index(value) if value in order else len(order)
+
+
+def sort_key(feature: dict) -> tuple[int, int, str]:
+    """Severity, then urgency, then alert ID: a total order, so cursors stay valid as alerts come and go."""
+    props = feature["properties"]
+    return (
+        _rank(props.get("severity"), SEVERITY_ORDER),
+        _rank(props.get("urgency"), URGENCY_ORDER),
+        str(props.get("id") or feature.get("id")),
+    )
+
+
+def encode_cursor(key: tuple[int, int, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, int, str]:
+    try:
+        severity, urgency, alert_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(severity), int(urgency), str(alert_id)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}") from None
+
+
+def page_alerts(features: Iterable[dict], limit: int, cursor: str | None = None) -> tuple[list[dict], str | None, int]:
+    """One page of alerts in severity order, starting after `cursor`.
+
+    `features` is consumed as a stream: only the `limit + 1` best alerts past the cursor are
+    kept (a bounded heap), never the whole set. Returns (page, next cursor or None, total alerts).
+    """
+    after = decode_cursor(cursor) if cursor else None
+    total = 0
+
+    def remaining():
+        nonlocal total
+        for feature in features:
+            total += 1
+            key = sort_key(feature)
+            if after is None or key > after:
+                yield key, feature
+
+    best = heapq.nsmallest(limit + 1, remaining(), key=lambda item: item[0])
+    page = best[:limit]
+    next_cursor = encode_cursor(page[-1][0]) if len(best) > limit else None
+    return [feature for _, feature in page], next_cursor, total
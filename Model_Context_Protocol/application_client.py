@@ -1,9 +1,16 @@
 import asyncio
-from typing import Optional
+import time
+from typing import Callable, Optional
 from contextlib import AsyncExitStack
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+from mcp.client.sse import sse_client
+from model_backends import BedrockStreamer, ModelBackend, stream_turn
+from llm_cache import CachingBackend, llm_cache_from_env
+from tool_registry import ToolRegistry
+from session_manager import SessionManager
+from tracing import call_tool_traced, new_trace_id, read_trace
 
 import boto3
 from dotenv import load_dotenv
@@ -15,19 +22,52 @@ session = boto3.Session(aws_access_key_id=os.getenv('ACCESS_KEY_ID'),
     aws_secret_access_key=os.getenv('SECRET_KEY'),
     region_name=os.getenv('AWS_REGION'))
 
+MODEL_ID = 'anthropic.claude-3-5-sonnet-20240620-v1:0'
+INFERENCE_CONFIG = {"maxTokens": 512, "temperature": 0.3, "topP": 0.9}
+# Max tool-call rounds per query before the loop gives up
+MAX_TOOL_STEPS = int(os.getenv('MAX_TOOL_STEPS', '5'))
+
 class MCPClient:
-    def __init__(self):
+    def __init__(self, max_steps: int = MAX_TOOL_STEPS, model_backend: Optional[ModelBackend] = None):
         # Initialize session and client objects
         self.session: Optional[ClientSession] = None
         self.exit_stack = AsyncExitStack()
-        self.anthropic_bedrock = session.client("bedrock-runtime", region_name='us-east-1')
+        # Any object with an async `converse_stream` works here, e.g. model_backends.ScriptedStreamer offline
+        backend = model_backend or BedrockStreamer(session.client("bedrock-runtime", region_name='us-east-1'))
+        # LLM_CACHE_MODE=record/replay reuses recorded responses for identical requests
+        llm_cache = llm_cache_from_env()
+        self.model_backend = CachingBackend(backend, llm_cache) if llm_cache else backend
+        self.max_steps = max_steps
+        self.tool_registry = ToolRegistry()
+        # Set instead of `session` when connected to several servers from a config file
+        self.session_manager: Optional[SessionManager] = None
+
+    async def connect_to_servers(self, config_path: str):
+        """Connect concurrently to every MCP server listed in a JSON config file
+
+        Args:
+            config_path: Path to a {"mcpServers": {...}} config file (see mcp_servers.json)
+        """
+        self.session_manager = SessionManager.from_config(config_path)
+        self.exit_stack.push_async_callback(self.session_manager.close)
+        await self.session_manager.connect_all()
+
+        tools = await self.session_manager.list_tools()
+        print("\nConnected to servers with tools:", [tool.name for tool in tools])
 
     async def connect_to_server(self, server_script_path: str):
         """Connect to an MCP server
         
         Args:
-            server_script_path: Path to the server script (.py or .js)
+            server_script_path: Path to the server script (.py or .js), or the URL of a server
+                already running with a network transport (e.g. http://localhost:8000/sse)
         """
+        if server_script_path.startswith(('http://', 'https://')):
+            transport = await self.exit_stack.enter_async_context(self._network_client(server_script_path))
+            self.stdio, self.write = transport[0], transport[1]
+            await self._start_session()
+            return
+
         is_python = server_script_path.endswith('.py')
         is_js = server_script_path.endswith('.js')
         if not (is_python or is_js):
@@ -42,18 +82,55 @@ class MCPClient:
         
         stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
         self.stdio, self.write = stdio_transport
-        self.session = await self.exit_stack.enter_async_context(ClientSession(self.stdio, self.write))
+        await self._start_session()
+
+    def _network_client(self, url: str):
+        """SSE transport for URLs ending in /sse, streamable HTTP (mcp>=1.8) otherwise"""
+        if url.rstrip('/').endswith('/sse'):
+            return sse_client(url)
+        from mcp.client.streamable_http import streamablehttp_client
+        return streamablehttp_client(url)
+
+    async def _start_session(self):
+        self.session = await self.exit_stack.enter_async_context(
+            ClientSession(self.stdio, self.write, message_handler=self.tool_registry.handle_message)
+        )
+        self.tool_registry.session = self.session
         
         await self.session.initialize()
         
-        # List available tools
-        response = await self.session.list_tools()
-        tools = response.tools
+        # List available tools (cached until the server reports tools/list_changed)
+        tools = await self.tool_registry.tools()
         print("\nConnected to server with tools:", [tool.name for tool in tools])
         print(f"\nInput Schema:{[tool.inputSchema for tool in tools]}")
 
-    async def process_query(self, query: str) -> str:
-        """Process a query using Claude and available tools"""
+    async def call_tool(self, tool_use: dict, trace_id: Optional[str] = None) -> dict:
+        """Execute one Bedrock toolUse block via the MCP session and wrap the outcome as a toolResult block"""
+        try:
+            if self.session_manager:
+                result = await self.session_manager.call_tool(tool_use['name'], tool_use['input'], trace_id)
+            else:
+                result = await call_tool_traced(self.session, tool_use['name'], tool_use['input'], trace_id)
+            text = "\n".join(content.text for content in result.content if content.type == "text")
+            status = "error" if result.isError else "success"
+        except Exception as e:
+            text = f"Tool call failed: {e}"
+            status = "error"
+        return {"toolResult": {
+            "toolUseId": tool_use['toolUseId'],
+            "content": [{"text": text}],
+            "status": status
+        }}
+
+    async def process_query(self, query: str, on_text: Optional[Callable[[str], None]] = None) -> str:
+        """Process a query using Claude and available tools.
+
+        Runs the tool loop: every toolUse block the model emits in a turn is executed concurrently,
+        the results are sent back as toolResult blocks, and this repeats until the model answers
+        or `max_steps` tool rounds have been used. Model output is streamed; `on_text` receives
+        the text as it arrives.
+        """
+        emit = on_text or (lambda text: None)
         messages = [
             {
                 "role": "user",
@@ -61,61 +138,62 @@ class MCPClient:
             }
         ]
 
-        response = await self.session.list_tools()
-        available_tools = [{"toolSpec":
-            { 
-            "name": tool.name,
-            "description": tool.description,
-            "inputSchema": {"json":tool.inputSchema}
-            }
-        } for tool in response.tools]
-
-        # Initial Claude API call
-        response = self.anthropic_bedrock.converse(
-            modelId='anthropic.claude-3-5-sonnet-20240620-v1:0',
-            messages=messages,
-            inferenceConfig={"maxTokens": 512, "temperature": 0.3, "topP": 0.9},
-            toolConfig = {"tools":available_tools}
-        )
-        content_dict = {k:v for elements in response['output']['message']['content'] for k,v in elements.items()}
-        print(f"Formatted LLM Response:\n{content_dict}")
+        available_tools = await (self.session_manager or self.tool_registry).bedrock_specs()
 
-        # Process response and handle tool calls
+        # Tool calls carry this ID so the server's timings for them can be looked up afterwards
+        trace_id = new_trace_id()
+        model_time = tool_time = 0.0
         final_text = []
-        if response['stopReason'] != 'tool_use':
-            final_text.append(content_dict['text'])
-        else:
-            tool_name = content_dict['toolUse']['name']
-            tool_args = content_dict['toolUse']['input']
-                
-            # Execute tool call
-            result = await self.session.call_tool(tool_name, tool_args)
-            # print(f"\nTool Call Result:\n{result}")
-            # print(f"\nTool Call Result Text:\n{result.content[0].text}")
-            final_text.append(f"\n[Calling tool {tool_name} with args {tool_args}]")
-
-            # Continue conversation with tool results
-            if content_dict['text']:
-                messages.append({
-                    "role": "assistant",
-                    "content": [{"text":content_dict['text']}]
-                })
-            messages.append({
-                "role": "user", 
-                "content": [{"text":result.content[0].text}]
-            })
-
-            # Get next response from Claude
-            response = self.anthropic_bedrock.converse(
-                modelId='anthropic.claude-3-5-sonnet-20240620-v1:0',
+        for step in range(self.max_steps + 1):
+            turn = await stream_turn(
+                self.model_backend,
+                on_text=emit,
+                modelId=MODEL_ID,
                 messages=messages,
-                inferenceConfig={"maxTokens": 512, "temperature": 0.3, "topP": 0.9},
+                inferenceConfig=INFERENCE_CONFIG,
+                toolConfig = {"tools":available_tools}
             )
+            message = turn.message
+            ttft = f"{turn.time_to_first_token:.2f}s" if turn.time_to_first_token is not None else "n/a"
+            print(f"\n[model turn {step + 1}: time to first token {ttft}, total {turn.total_latency:.2f}s]")
+            model_time += turn.total_latency
+            messages.append(message)
+
+            final_text.extend(block['text'] for block in message['content'] if 'text' in block)
+            tool_uses = [block['toolUse'] for block in message['content'] if 'toolUse' in block]
+            if turn.stop_reason != 'tool_use' or not tool_uses:
+                break
+            if step == self.max_steps:
+                final_text.append(f"\n[Stopped after {self.max_steps} tool steps]")
+                emit(final_text[-1])
+                break
+
+            for tool_use in tool_uses:
+                final_text.append(f"\n[Calling tool {tool_use['name']} with args {tool_use['input']}]")
+                emit(final_text[-1])
+
+            # Execute all tool calls of this turn concurrently and feed the results back together
+            tools_start = time.perf_counter()
+            tool_results = await asyncio.gather(*(self.call_tool(tool_use, trace_id) for tool_use in tool_uses))
+            tool_time += time.perf_counter() - tools_start
+            messages.append({
+                "role": "user",
+                "content": list(tool_results)
+            })
 
-            final_text.append(response['output']['message']['content'][0]['text'])
-
+        if tool_time:
+            await self.print_time_split(trace_id, model_time, tool_time)
         return "\n".join(final_text)
 
+    async def print_time_split(self, trace_id: str, model_time: float, tool_time: float):
+        """Report how a query's time split between the model, MCP tool calls and the servers' upstream APIs"""
+        trace = await (self.session_manager.read_trace(trace_id) if self.session_manager else read_trace(self.session, trace_id))
+        line = f"[trace {trace_id[:8]}: model {model_time:.2f}s, tool calls {tool_time:.2f}s"
+        if trace:
+            # Summed over concurrent calls, so these can exceed the wall-clock tool time
+            line += f" (server {trace['tool_ms'] / 1000:.2f}s, upstream {trace['upstream_ms'] / 1000:.2f}s)"
+        print(f"\n{line}]")
+
     async def chat_loop(self):
         """Run an interactive chat loop"""
         print("\nMCP Client Started!")
@@ -128,8 +206,9 @@ class MCPClient:
                 if query.lower() == 'quit':
                     break
                     
-                response = await self.process_query(query)
-                print("\n" + response)
+                print()
+                await self.process_query(query, on_text=lambda text: print(text, end="", flush=True))
+                print()
                     
             except Exception as e:
                 print(f"\nError: {str(e)}")
@@ -140,12 +219,15 @@ class MCPClient:
 
 async def main():
     if len(sys.argv) < 2:
-        print(f"Usage: python application_client.py {sys.argv[1]}")
+        print("Usage: python application_client.py <server_script.py | servers.json | server_url>")
         sys.exit(1)
         
     client = MCPClient()
     try:
-        await client.connect_to_server(sys.argv[1])
+        if sys.argv[1].endswith('.json'):
+            await client.connect_to_servers(sys.argv[1])
+        else:
+            await client.connect_to_server(sys.argv[1])
         await client.chat_loop()
     finally:
         await client.cleanup()
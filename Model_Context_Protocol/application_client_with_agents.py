@@ -13,7 +13,10 @@ from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import START, MessagesState, StateGraph
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langgraph.prebuilt import create_react_agent
-from langchain_mcp_adapters.tools import load_mcp_tools
+from tool_registry import ToolRegistry
+from sqlite_checkpointer import SQLiteCheckpointer
+from conversation_host import ConversationHost, parse_serve_args
+from langchain_llm_cache import langchain_cache_from_env
 from langgraph.managed import IsLastStep
 from langchain_aws import ChatBedrockConverse
 
@@ -23,12 +26,24 @@ from dotenv import load_dotenv
 
 load_dotenv()  # load environment variables from .env
 
+# With --serve: SQLite file for conversation checkpoints; threads are kept in process memory when unset
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB")
+# Checkpoints kept per thread in CHECKPOINT_DB
+CHECKPOINT_KEEP = int(os.getenv("CHECKPOINT_KEEP", "10"))
+# Threads whose latest state stays cached in memory (LRU)
+CHECKPOINT_CACHE_THREADS = int(os.getenv("CHECKPOINT_CACHE_THREADS", "256"))
+# With --serve: conversation turns run at once, overall and per session
+HOST_MAX_CONCURRENCY = int(os.getenv("HOST_MAX_CONCURRENCY", "8"))
+HOST_SESSION_CONCURRENCY = int(os.getenv("HOST_SESSION_CONCURRENCY", "1"))
+
 model = ChatBedrockConverse(
     model_id="anthropic.claude-3-5-sonnet-20240620-v1:0",
-    aws_access_key_id= os.getnev('AWS_ACCESS_KEY_ID'),
+    aws_access_key_id= os.getenv('AWS_ACCESS_KEY_ID'),
     aws_secret_access_key= os.getenv('AWS_SECRET_KEY'),
     region_name="us-east-1",
-    temperature=0.3
+    temperature=0.3,
+    # LLM_CACHE_MODE=record/replay reuses recorded responses for identical requests
+    cache=langchain_cache_from_env()
 )
 
 class State(TypedDict):
@@ -41,6 +56,7 @@ class MCPClient:
         # Initialize session and client objects
         self.session: Optional[ClientSession] = None
         self.exit_stack = AsyncExitStack()
+        self.tool_registry = ToolRegistry()
         self.anthropic_bedrock = model
 
     async def connect_to_server(self, server_script_path: str):
@@ -63,22 +79,23 @@ class MCPClient:
         
         stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
         self.stdio, self.write = stdio_transport
-        self.session = await self.exit_stack.enter_async_context(ClientSession(self.stdio, self.write))
+        self.session = await self.exit_stack.enter_async_context(
+            ClientSession(self.stdio, self.write, message_handler=self.tool_registry.handle_message)
+        )
+        self.tool_registry.session = self.session
         
         await self.session.initialize()
-        
-        # List available tools
-        mcp_tool_list = await load_mcp_tools(self.session)
-        return mcp_tool_list
+        # The tools are listed and converted when the first turn builds the agent
 
-    async def process_query(self, query: str, agent) -> str:
+    async def process_query(self, query: str, agent, thread_id: Optional[str] = None) -> str:
         """Process a query using Claude and available tools"""
         messages = {'messages':query}
-        agent_response = await agent.ainvoke(messages)
+        config = {"configurable": {"thread_id": thread_id}} if thread_id else None
+        agent_response = await agent.ainvoke(messages, config)
 
         return agent_response['messages'][-1].content
 
-    async def chat_loop(self,agent):
+    async def chat_loop(self,build_agent):
         """Run an interactive chat loop"""
         print("\nMCP Client Started!")
         print("Type your queries or 'quit' to exit.")
@@ -90,6 +107,8 @@ class MCPClient:
                 if query.lower() == 'quit':
                     break
                     
+                # Rebuilt only if the server's tool list changed since the last query
+                agent = await self.tool_registry.build(build_agent)
                 response = await self.process_query(query,agent)
                 print("\n" + response)
                     
@@ -106,11 +125,29 @@ async def main():
         sys.exit(1)
         
     client = MCPClient()
+    checkpointer = None
     try:
-        mcp_tool_list = await client.connect_to_server(sys.argv[1])
-        agent = create_react_agent(model=model,tools=mcp_tool_list,prompt="You are an weather expert with multiple tools at your disposal. Answer in a polite manner")
-        await client.chat_loop(agent=agent)
+        await client.connect_to_server(sys.argv[1])
+        serve, port = parse_serve_args(sys.argv)
+        # When serving, each session keeps its own history under its thread_id
+        if serve and CHECKPOINT_DB:
+            checkpointer = SQLiteCheckpointer(CHECKPOINT_DB, keep=CHECKPOINT_KEEP, max_threads=CHECKPOINT_CACHE_THREADS)
+        elif serve:
+            checkpointer = MemorySaver()
+        def build_agent(tools):
+            return create_react_agent(model=model,tools=tools,checkpointer=checkpointer,prompt="You are an weather expert with multiple tools at your disposal. Answer in a polite manner")
+        if serve:
+            async def run_turn(thread_id: str, query: str):
+                agent = await client.tool_registry.build(build_agent)
+                return await client.process_query(query, agent, thread_id)
+
+            host = ConversationHost(run_turn, max_concurrency=HOST_MAX_CONCURRENCY, per_session_limit=HOST_SESSION_CONCURRENCY)
+            await host.serve(port)
+        else:
+            await client.chat_loop(build_agent=build_agent)
     finally:
+        if isinstance(checkpointer, SQLiteCheckpointer):
+            checkpointer.close()
         await client.cleanup()
 
 if __name__ == "__main__":
@@ -6,7 +6,11 @@ from typing import Optional,Sequence
 from typing_extensions import Annotated, TypedDict
 from contextlib import AsyncExitStack
 
-from langchain_mcp_adapters.tools import load_mcp_tools
+from tool_registry import ToolRegistry
+from context_trimming import ContextTrimmer
+from sqlite_checkpointer import SQLiteCheckpointer
+from conversation_host import ConversationHost, parse_serve_args
+from langchain_llm_cache import langchain_cache_from_env
 from langchain_aws import ChatBedrockConverse
 from langgraph.prebuilt import create_react_agent
 from langgraph.graph.message import add_messages
@@ -14,7 +18,7 @@ from typing_extensions import Annotated, TypedDict
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import START, MessagesState, StateGraph
-from langchain_core.messages import SystemMessage,HumanMessage,AIMessage,trim_messages,ToolMessage,BaseMessage
+from langchain_core.messages import SystemMessage,HumanMessage,AIMessage,ToolMessage,BaseMessage
 from langgraph.managed import IsLastStep
 
 from mcp import ClientSession, StdioServerParameters
@@ -24,6 +28,19 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 
+# Token budget for the history sent to the model on each call
+MAX_CONTEXT_TOKENS = int(os.getenv("MAX_CONTEXT_TOKENS", "4000"))
+# Tool outputs longer than this are compressed before they reach the model
+MAX_TOOL_MESSAGE_TOKENS = int(os.getenv("MAX_TOOL_MESSAGE_TOKENS", "800"))
+# SQLite file for conversation checkpoints; threads are kept in process memory when unset
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB")
+# Checkpoints kept per thread in CHECKPOINT_DB
+CHECKPOINT_KEEP = int(os.getenv("CHECKPOINT_KEEP", "10"))
+# Threads whose latest state stays cached in memory (LRU)
+CHECKPOINT_CACHE_THREADS = int(os.getenv("CHECKPOINT_CACHE_THREADS", "256"))
+# With --serve: conversation turns run at once, overall and per session
+HOST_MAX_CONCURRENCY = int(os.getenv("HOST_MAX_CONCURRENCY", "8"))
+HOST_SESSION_CONCURRENCY = int(os.getenv("HOST_SESSION_CONCURRENCY", "1"))
 
 aws_session = boto3.Session(aws_access_key_id=os.getenv('CLAUDE_KEY_ID'),
     aws_secret_access_key=os.getenv('CLAUDE_ACCESS_KEY'),
@@ -34,6 +51,7 @@ class MCPClient:
         # Initialize session and client objects
         self.session: Optional[ClientSession] = None
         self.exit_stack = AsyncExitStack()
+        self.tool_registry = ToolRegistry()
 
     async def connect_to_server(self, server_script_path: str):
         """Connect to an MCP server
@@ -55,11 +73,14 @@ class MCPClient:
         
         stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
         self.stdio, self.write = stdio_transport
-        self.session = await self.exit_stack.enter_async_context(ClientSession(self.stdio, self.write))
+        self.session = await self.exit_stack.enter_async_context(
+            ClientSession(self.stdio, self.write, message_handler=self.tool_registry.handle_message)
+        )
+        self.tool_registry.session = self.session
         
         await self.session.initialize()
 
-        mcp_tool_list = await load_mcp_tools(self.session)
+        mcp_tool_list = await self.tool_registry.langchain_tools()
         return mcp_tool_list
     
     async def cleanup(self):
@@ -77,42 +98,58 @@ async def main():
         sys.exit(1)
         
     client = MCPClient()
+    memory = None
     try:
         model = ChatBedrockConverse(
             model_id="anthropic.claude-3-5-sonnet-20240620-v1:0",
             aws_access_key_id=os.getenv("CLAUDE_KEY_ID"),
             aws_secret_access_key=os.getenv("CLAUDE_ACCESS_KEY"),
             region_name="us-east-1",
-            temperature=0.3
+            temperature=0.3,
+            # LLM_CACHE_MODE=record/replay reuses recorded responses for identical requests
+            cache=langchain_cache_from_env()
         )
         mcp_tool_list = await client.connect_to_server(sys.argv[1])
-        print(f"\nMCP Tool List using Langchain:\n{mcp_tool_list}")
+        # stderr: with --serve, stdout carries the JSONL responses
+        print(f"\nMCP Tool List using Langchain:\n{mcp_tool_list}", file=sys.stderr)
 
         workflow = StateGraph(state_schema=State)
-        agent = create_react_agent(model=model,tools=mcp_tool_list,state_schema=State,prompt='''Utilize the provided tools when required. The nearest place search tool and navigation tool already has the current location. 
+        trimmer = ContextTrimmer(max_tokens=MAX_CONTEXT_TOKENS, max_tool_tokens=MAX_TOOL_MESSAGE_TOKENS)
+        # The pre-model hook also trims tool results produced within the same turn
+        build_agent = lambda tools: create_react_agent(model=model,tools=tools,state_schema=State,pre_model_hook=trimmer.pre_model_hook,prompt='''Utilize the provided tools when required. The nearest place search tool and navigation tool already has the current location. 
                                    If you are using the navigation tool, then your response should strictly be {'url': the generated url,'text':'I am now opening the navigation tool for you'},without adding anything extra from your end.''')
         
         messages = []
-        trimmer = trim_messages(
-            max_tokens=8, #This is the count, last 5 messages will be kept as history
-            strategy="last",
-            token_counter=len, #"len" means it will keep messages on the count and not on tokens
-            include_system=True,
-            allow_partial=False,
-            start_on="human",
-        )
 
         async def call_model(state: State):
-            trimmed_messages = trimmer.invoke(state["messages"])
-            print(f"Number of msgs in trimmed messages:{len(trimmed_messages)}")
-            agent_response = await agent.ainvoke({"messages":trimmed_messages})
+            # The pre-model hook trims and compresses only what the model sees, so the agent gets the
+            # untouched history and just the messages it added are written back to the thread
+            # (the agent is rebuilt only if the server's tool list changed)
+            agent = await client.tool_registry.build(build_agent)
+            agent_response = await agent.ainvoke({"messages":state["messages"]})
+            seen = {message.id for message in state["messages"]}
 
-            return agent_response
+            return {"messages":[message for message in agent_response["messages"] if message.id not in seen]}
         
         workflow.add_edge(START, "model")
         workflow.add_node("model", call_model)
-        memory = MemorySaver()
+        if CHECKPOINT_DB:
+            memory = SQLiteCheckpointer(CHECKPOINT_DB, keep=CHECKPOINT_KEEP, max_threads=CHECKPOINT_CACHE_THREADS)
+        else:
+            memory = MemorySaver()
         graph_app = workflow.compile(checkpointer=memory)
+
+        serve, port = parse_serve_args(sys.argv)
+        if serve:
+            # Every session shares this MCP session and graph; the session ID is its thread_id
+            async def run_turn(thread_id: str, text: str):
+                response = await graph_app.ainvoke({"messages":[HumanMessage(content=text)]},{"configurable": {"thread_id": thread_id}})
+                return response['messages'][-1].content
+
+            host = ConversationHost(run_turn, max_concurrency=HOST_MAX_CONCURRENCY, per_session_limit=HOST_SESSION_CONCURRENCY)
+            await host.serve(port)
+            return
+
         conversation = [
         {
             "type":"text",
@@ -130,6 +167,8 @@ async def main():
             print(final_response)
 
     finally:
+        if isinstance(memory, SQLiteCheckpointer):
+            memory.close()
         await client.cleanup()
 
 
@@ -0,0 +1,267 @@
+"""End-to-end benchmark of mcp_server.py, fully offline.
+
+Starts local stand-ins for NWS, Places and Tavily (benchmarks/fake_upstreams.py), runs the
+server on a local SSE port against them and drives it with N concurrent MCP sessions.
+Reports:
+
+- p50/p99 latency per tool
+- upstream calls per API
+- tool-call throughput across the N sessions
+- server memory per connected session
+- p50/p99 of a full `application_client.py` query (tool loop with a scripted model)
+
+    python benchmarks/e2e_bench.py --sessions 20 --calls 50 --latency 0.05
+    python benchmarks/e2e_bench.py --save benchmarks/e2e_baseline.json
+    python benchmarks/e2e_bench.py --baseline benchmarks/e2e_baseline.json
+
+Comparing with a baseline exits with status 1 if a latency or memory figure grew, or the
+throughput dropped, by more than --tolerance.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Optional
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+from fake_upstreams import FakeUpstreams
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+STATES = ["CA", "TX", "NY", "FL", "WA", "CO"]
+LOCATIONS = [(37.7749, -122.4194), (40.7128, -74.0060), (47.6062, -122.3321), (29.7604, -95.3698)]
+QUERIES = ["coffee near me", "best pizza", "museum", "weather tomorrow"]
+
+# Tool mix each session cycles through: (tool, arguments for the i-th call)
+WORKLOAD = [
+    ("get_alerts", lambda i: {"state": STATES[i % len(STATES)]}),
+    ("get_forecast", lambda i: dict(zip(("latitude", "longitude"), LOCATIONS[i % len(LOCATIONS)]))),
+    ("get_alerts_many", lambda i: {"states": STATES[:3]}),
+    ("get_forecast_many", lambda i: {"locations": [{"latitude": lat, "longitude": lon} for lat, lon in LOCATIONS[:3]]}),
+    ("search_external_info", lambda i: {"query": QUERIES[i % len(QUERIES)]}),
+    ("nearest_place_finder_agent", lambda i: {"prompt": QUERIES[i % len(QUERIES)]}),
+    ("navigation_agent", lambda i: {"prompt": QUERIES[i % len(QUERIES)]}),
+]
+
+
+def percentile(values: list[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """Resident memory of a process, or None where it can't be read."""
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, env: dict[str, str]) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(SERVER_DIR, "mcp_server.py"), "--transport", "sse", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=SERVER_DIR, env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("mcp_server.py exited during startup")
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return process
+        time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("mcp_server.py did not start listening in time")
+
+
+async def run_session(url: str, ready: asyncio.Event, connected: list, calls: int, offset: int,
+                      latencies: dict[str, list[float]], errors: list) -> None:
+    async with sse_client(url) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            connected.append(session)
+            await ready.wait()
+            for i in range(offset, offset + calls):
+                tool, arguments = WORKLOAD[i % len(WORKLOAD)]
+                start = time.perf_counter()
+                result = await session.call_tool(tool, arguments(i))
+                latencies[tool].append(time.perf_counter() - start)
+                if result.isError:
+                    errors.append((tool, result.content[0].text if result.content else ""))
+
+
+async def run_tool_workload(url: str, pid: int, sessions: int, calls: int, fake: FakeUpstreams) -> dict:
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: list = []
+    connected: list = []
+    ready = asyncio.Event()
+
+    rss_before = rss_bytes(pid)
+    tasks = [asyncio.create_task(run_session(url, ready, connected, calls, n, latencies, errors))
+             for n in range(sessions)]
+    while len(connected) < sessions:
+        if any(task.done() for task in tasks):
+            await asyncio.gather(*tasks)
+        await asyncio.sleep(0.05)
+    rss_after = rss_bytes(pid)
+
+    fake.reset_counts()
+    start = time.perf_counter()
+    ready.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "latency": {tool: {"p50": percentile(values, 50), "p99": percentile(values, 99), "calls": len(values)}
+                    for tool, values in sorted(latencies.items())},
+        "upstream_calls": dict(fake.counts),
+        "throughput": sessions * calls / elapsed,
+        "memory_per_session": (rss_after - rss_before) / sessions if rss_before and rss_after else None,
+        "server_rss": rss_after,
+        "errors": len(errors),
+        "error_samples": errors[:3],
+    }
+
+
+async def run_client_queries(url: str, queries: int) -> dict:
+    """Full client tool loops (model -> get_forecast -> model) with a scripted model."""
+    from application_client import MCPClient
+    from model_backends import ScriptedStreamer
+
+    turns = [
+        {"role": "assistant", "content": [{"toolUse": {"toolUseId": "t1", "name": "get_forecast",
+                                                      "input": {"latitude": LOCATIONS[0][0], "longitude": LOCATIONS[0][1]}}}]},
+        {"role": "assistant", "content": [{"text": "It will be clear tonight with light winds."}]},
+    ]
+    client = MCPClient()
+    durations = []
+    # The client reports each model turn on stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            await client.connect_to_server(url)
+            for _ in range(queries):
+                client.model_backend = ScriptedStreamer(turns)
+                start = time.perf_counter()
+                await client.process_query("What's the weather in San Francisco?")
+                durations.append(time.perf_counter() - start)
+        finally:
+            await client.cleanup()
+    return {"p50": percentile(durations, 50), "p99": percentile(durations, 99), "queries": queries}
+
+
+def flatten(results: dict) -> dict[str, tuple[float, bool]]:
+    """Metrics to compare against a baseline: name -> (value, higher is worse)."""
+    metrics = {"throughput": (results["throughput"], False)}
+    for tool, stats in results["latency"].items():
+        metrics[f"{tool} p50"] = (stats["p50"], True)
+        metrics[f"{tool} p99"] = (stats["p99"], True)
+    metrics["client query p50"] = (results["client_query"]["p50"], True)
+    metrics["client query p99"] = (results["client_query"]["p99"], True)
+    if results["memory_per_session"]:
+        metrics["memory per session"] = (results["memory_per_session"], True)
+    for api, count in results["upstream_calls"].items():
+        metrics[f"{api} upstream calls"] = (count, True)
+    return metrics
+
+
+def report(results: dict, args) -> None:
+    print(f"{args.sessions} sessions x {args.calls} calls, upstream latency {args.latency * 1000:.0f} ms\n")
+    print(f"{'tool':<28} {'calls':>6} {'p50 ms':>9} {'p99 ms':>9}")
+    for tool, stats in results["latency"].items():
+        print(f"{tool:<28} {stats['calls']:>6} {stats['p50'] * 1000:>9.1f} {stats['p99'] * 1000:>9.1f}")
+    print(f"\nthroughput: {results['throughput']:.1f} tool calls/s")
+    print("upstream calls: " + ", ".join(f"{api}={count}" for api, count in sorted(results["upstream_calls"].items())))
+    if results["memory_per_session"] is not None:
+        print(f"server memory: {results['server_rss'] / 2**20:.1f} MiB, "
+              f"{results['memory_per_session'] / 1024:.1f} KiB per session")
+    query = results["client_query"]
+    print(f"client query (scripted model): p50 {query['p50'] * 1000:.1f} ms, p99 {query['p99'] * 1000:.1f} ms")
+    if results["errors"]:
+        print(f"\n{results['errors']} tool calls returned errors, e.g. {results['error_samples']}")
+
+
+async def run(args) -> dict:
+    fake = FakeUpstreams(latency=args.latency, jitter=args.jitter, alerts=args.alerts,
+                         description_bytes=args.description_bytes).start()
+    port = free_port()
+    server = start_server(port, fake.env())
+    url = f"http://127.0.0.1:{port}/sse"
+    try:
+        results = await run_tool_workload(url, server.pid, args.sessions, args.calls, fake)
+        results["client_query"] = await run_client_queries(url, args.client_queries)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        fake.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent MCP sessions")
+    parser.add_argument("--calls", type=int, default=len(WORKLOAD) * 4, help="Tool calls per session")
+    parser.add_argument("--client-queries", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds each upstream request takes")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--alerts", type=int, default=10, help="Alerts per state in the fake NWS payloads")
+    parser.add_argument("--description-bytes", type=int, default=1000)
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results saved with --save")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression vs the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    report(results, args)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = flatten(json.load(f))
+        regressed = False
+        print("\nvs baseline:")
+        for name, (value, higher_is_worse) in flatten(results).items():
+            if name not in baseline or not baseline[name][0]:
+                continue
+            change = value / baseline[name][0] - 1
+            flag = "REGRESSION" if (change if higher_is_worse else -change) > args.tolerance else ""
+            regressed |= bool(flag)
+            print(f"  {name:<36} {baseline[name][0]:>12.4g} -> {value:>12.4g} ({change:+.0%}) {flag}")
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
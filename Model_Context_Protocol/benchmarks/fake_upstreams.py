@@ -0,0 +1,210 @@
+"""Local stand-ins for the NWS, Google Places and Tavily APIs.
+
+Serves the endpoints mcp_server.py calls with synthetic payloads of configurable size,
+after a configurable delay, and counts the requests per upstream. Point the server at it with
+`FakeUpstreams.env()` (NWS_API_BASE / PLACES_API_BASE / TAVILY_API_BASE), or run it on its own:
+
+    python benchmarks/fake_upstreams.py --port 8765 --latency 0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+SEVERITIES = ["Extreme", "Severe", "Moderate", "Minor"]
+EVENTS = ["Flood Warning", "Wind Advisory", "Winter Storm Watch", "Heat Advisory"]
+
+
+class FakeUpstreams:
+    """Threaded HTTP server that answers like NWS, Places and Tavily.
+
+    Every request waits `latency` seconds (plus up to `jitter`). Payload sizes are set by
+    `alerts` (alerts per state), `description_bytes` (length of each alert description),
+    `places` and `results` (search results). NWS responses carry an ETag and
+    `Cache-Control: max-age=<max_age>`, like the real API, or `cache_control` when it is set.
+    """
+
+    def __init__(self, port: int = 0, latency: float = 0.0, jitter: float = 0.0, alerts: int = 10,
+                 description_bytes: int = 1000, places: int = 5, results: int = 2, max_age: int = 60,
+                 cache_control: Optional[str] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.alerts = alerts
+        self.description_bytes = description_bytes
+        self.places = places
+        self.results = results
+        self.max_age = max_age
+        self.cache_control = cache_control
+        self.counts: Counter = Counter()
+        self._counts_lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def env(self) -> dict[str, str]:
+        """Environment variables that point mcp_server.py at these stand-ins."""
+        return {
+            "NWS_API_BASE": f"{self.base_url}/nws",
+            "PLACES_API_BASE": f"{self.base_url}/places/v1",
+            "TAVILY_API_BASE": f"{self.base_url}/tavily",
+            "GOOGLE_API_KEY": "fake-key",
+            "TAVILY_API_KEY": "fake-key",
+        }
+
+    def start(self) -> "FakeUpstreams":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counts(self) -> None:
+        with self._counts_lock:
+            self.counts.clear()
+
+    def _count(self, route: str) -> None:
+        with self._counts_lock:
+            self.counts[route] += 1
+
+    # -- payloads -------------------------------------------------------------
+
+    def alert_features(self, state: str) -> list[dict]:
+        description = ("Heavy rain and strong winds are expected. " * (self.description_bytes // 43 + 1))[:self.description_bytes]
+        return [{
+            "id": f"urn:fake:{state}:{i}",
+            "properties": {
+                "id": f"urn:fake:{state}:{i}",
+                "event": EVENTS[i % len(EVENTS)],
+                "severity": SEVERITIES[i % len(SEVERITIES)],
+                "areaDesc": f"{state} County {i}; {state} County {i + 1}",
+                "description": description,
+                "instruction": "Move to higher ground.",
+                "geocode": {"UGC": [f"{state}Z{i:03d}"]},
+                "affectedZones": [f"https://api.weather.gov/zones/forecast/{state}Z{i:03d}"],
+            },
+        } for i in range(self.alerts)]
+
+    def nws(self, path: str) -> Optional[dict]:
+        if path.startswith("/points/"):
+            return {"properties": {"forecast": f"{self.base_url}/nws/gridpoints/FAKE/1,1/forecast"}}
+        if path.startswith("/gridpoints/"):
+            return {"properties": {"periods": [{
+                "name": f"Period {i}", "temperature": 50 + i, "temperatureUnit": "F",
+                "windSpeed": "5 mph", "windDirection": "N", "detailedForecast": "Clear skies.",
+            } for i in range(14)]}}
+        if path.startswith("/alerts/active/area/"):
+            return {"features": self.alert_features(path.rsplit("/", 1)[-1])}
+        if path == "/alerts/active":
+            return {"features": [f for state in ("CA", "TX", "NY", "FL") for f in self.alert_features(state)]}
+        if path.startswith("/alerts/urn:fake:"):
+            # /alerts/urn:fake:<state>:<n>
+            _, _, state, index = path.rsplit("/", 1)[-1].split(":")
+            features = self.alert_features(state)
+            return features[int(index)] if index.isdigit() and int(index) < len(features) else None
+        return None
+
+    def place(self, i: int) -> dict:
+        return {
+            "id": f"place-{i}",
+            "displayName": {"text": f"Place {i}"},
+            "formattedAddress": f"{i} Fake Street, London",
+            "rating": 4.0 + (i % 10) / 10,
+            "location": {"latitude": 51.51 + i / 1000, "longitude": -0.09 - i / 1000},
+            "currentOpeningHours": {"openNow": i % 2 == 0},
+            "googleMapsUri": f"https://maps.google.com/?cid={i}",
+        }
+
+    def search(self, query: str, max_results: int) -> dict:
+        return {"query": query, "results": [{
+            "title": f"Result {i} for {query}",
+            "url": f"https://example.com/{i}",
+            "content": "Lorem ipsum dolor sit amet. " * 20,
+            "score": 1 - i / 10,
+        } for i in range(min(max_results, self.results))]}
+
+    # -- HTTP -----------------------------------------------------------------
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _wait(self):
+                time.sleep(fake.latency + random.uniform(0, fake.jitter))
+
+            def _send(self, status: int, body: Optional[dict] = None, headers: Optional[dict] = None):
+                data = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if not path.startswith("/nws/"):
+                    return self._send(404, {"error": "not found"})
+                fake._count("nws")
+                self._wait()
+                body = fake.nws(path[len("/nws"):])
+                if body is None:
+                    return self._send(404, {"title": "Not Found"})
+                headers = {"ETag": '"fake-v1"', "Cache-Control": fake.cache_control or f"public, max-age={fake.max_age}"}
+                if self.headers.get("If-None-Match") == '"fake-v1"':
+                    return self._send(304, headers=headers)
+                self._send(200, body, headers)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.startswith("/places/"):
+                    fake._count("places")
+                    self._wait()
+                    count = min(request.get("maxResultCount", 5), fake.places)
+                    return self._send(200, {"places": [fake.place(i) for i in range(count)]})
+                if self.path.startswith("/tavily/"):
+                    fake._count("tavily")
+                    self._wait()
+                    return self._send(200, fake.search(request.get("query", ""), request.get("max_results", 5)))
+                self._send(404, {"error": "not found"})
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds each upstream request takes")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random delay of up to this many seconds")
+    parser.add_argument("--alerts", type=int, default=10, help="Alerts per state")
+    parser.add_argument("--description-bytes", type=int, default=1000)
+    args = parser.parse_args()
+
+    fake = FakeUpstreams(args.port, args.latency, args.jitter, args.alerts, args.description_bytes).start()
+    for name, value in fake.env().items():
+        print(f"{name}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Startup benchmark for mcp_server.py.
+
+Every stdio client pays the server's startup before its first tool call, so this measures,
+over several freshly spawned server processes:
+
+- spawn -> `initialize` complete
+- `initialize` -> first `list_tools` response
+
+and shows which imports of the server module take the longest (`python -X importtime`).
+
+Save a run as a baseline and compare later runs against it to catch regressions:
+
+    python benchmarks/startup_bench.py --runs 10 --save benchmarks/startup_baseline.json
+    python benchmarks/startup_bench.py --runs 10 --baseline benchmarks/startup_baseline.json
+
+The comparison exits with status 1 if any median is more than --tolerance slower.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def measure_startup(server_script: str) -> tuple[float, float]:
+    """Spawn one server; return (spawn -> initialized, initialized -> tools listed) in seconds."""
+    params = StdioServerParameters(command=sys.executable, args=[server_script], env=dict(os.environ))
+    start = time.perf_counter()
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            initialized = time.perf_counter()
+            await session.list_tools()
+            listed = time.perf_counter()
+    return initialized - start, listed - initialized
+
+
+def import_breakdown(module: str) -> tuple[float, list[tuple[str, float]]]:
+    """Import `module` in a fresh interpreter; return its total import time and its direct imports by cost (seconds)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SERVER_DIR, capture_output=True, text=True, env=dict(os.environ),
+    )
+    total = 0.0
+    direct: list[tuple[str, float]] = []
+    pending: list[tuple[str, float]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        # importtime lists a module's imports before the module itself
+        if depth == 0:
+            if name.strip() == module:
+                total, direct = int(cumulative) / 1e6, pending
+            pending = []
+        elif depth == 1:
+            pending.append((name.strip(), int(cumulative) / 1e6))
+    return total, sorted(direct, key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", default=os.path.join(SERVER_DIR, "mcp_server.py"))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to show")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results saved with --save")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    module = os.path.splitext(os.path.basename(args.server))[0]
+    import_total, imports = import_breakdown(module)
+    print(f"import {module}: {import_total * 1000:.1f} ms")
+    for name, seconds in imports[:args.top]:
+        print(f"  {name:<40} {seconds * 1000:8.1f} ms")
+
+    timings = [asyncio.run(measure_startup(args.server)) for _ in range(args.runs)]
+    results = {
+        "import": import_total,
+        "initialize": statistics.median(t[0] for t in timings),
+        "list_tools": statistics.median(t[1] for t in timings),
+    }
+    print(f"\nspawn -> initialize (median of {args.runs}): {results['initialize'] * 1000:.1f} ms")
+    print(f"initialize -> list_tools (median of {args.runs}): {results['list_tools'] * 1000:.1f} ms")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressed = False
+        print("\nvs baseline:")
+        for key, value in results.items():
+            change = value / baseline[key] - 1 if baseline.get(key) else 0.0
+            flag = "REGRESSION" if change > args.tolerance else ""
+            regressed |= bool(flag)
+            print(f"  {key:<12} {baseline[key] * 1000:8.1f} -> {value * 1000:8.1f} ms ({change:+.0%}) {flag}")
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import json
+from typing import Any
+
+# Fields a compact alert / forecast period can carry, and the ones returned when none are requested
+ALERT_FIELDS = ("event", "severity", "urgency", "headline", "areas", "onset", "expires", "description", "instruction")
+DEFAULT_ALERT_FIELDS = ("event", "severity", "areas", "expires", "description")
+PERIOD_FIELDS = ("name", "temperature", "wind", "precipitation", "forecast", "detailedForecast")
+DEFAULT_PERIOD_FIELDS = ("name", "temperature", "wind", "forecast")
+
+# Hint returned once per compact alert list instead of the full texts
+ALERT_DETAILS_HINT = "Texts ending in '…' are truncated; call get_alert_details with the alert id for the full text."
+
+
+def to_json(value: Any) -> str:
+    """Minified JSON: the indentation FastMCP adds to dict results costs tokens for nothing."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def select_fields(fields: list[str] | None, allowed: tuple[str, ...], default: tuple[str, ...]) -> list[str]:
+    if not fields:
+        return list(default)
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}; choose from {list(allowed)}")
+    return list(dict.fromkeys(fields))
+
+
+def dedupe_areas(area_desc: str | None) -> list[str]:
+    """Split an NWS `areaDesc` ("A; B; a") into its distinct areas, keeping their order."""
+    areas: dict[str, str] = {}
+    for area in (area_desc or "").split(";"):
+        area = " ".join(area.split())
+        if area:
+            areas.setdefault(area.casefold(), area)
+    return list(areas.values())
+
+
+def truncate(text: str | None, max_chars: int) -> str | None:
+    """Collapse whitespace and cut `text` to `max_chars` at a word boundary, marking the cut with '…'."""
+    if text is None:
+        return None
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0] or text[:max_chars]
+    return cut + "…"
+
+
+def compact_alert(feature: dict, fields: list[str], max_chars: int) -> dict[str, Any]:
+    props = feature["properties"]
+    alert: dict[str, Any] = {"id": props.get("id") or feature.get("id")}
+    for field in fields:
+        if field == "areas":
+            value: Any = dedupe_areas(props.get("areaDesc"))
+        elif field in ("description", "instruction"):
+            value = truncate(props.get(field), max_chars)
+        else:
+            value = props.get(field)
+        if value:
+            alert[field] = value
+    return alert
+
+
+def compact_alerts(features: list[dict], fields: list[str] | None = None, max_chars: int = 200) -> dict[str, Any]:
+    """Alerts as short dicts of the requested fields, with deduplicated areas and truncated texts."""
+    fields = select_fields(fields, ALERT_FIELDS, DEFAULT_ALERT_FIELDS)
+    alerts = [compact_alert(feature, fields, max_chars) for feature in features]
+    result: dict[str, Any] = {"count": len(alerts), "alerts": alerts}
+    if any(str(alert.get(field, "")).endswith("…") for alert in alerts for field in ("description", "instruction")):
+        result["more"] = ALERT_DETAILS_HINT
+    return result
+
+
+def compact_period(period: dict, fields: list[str]) -> dict[str, Any]:
+    values = {
+        "name": period.get("name"),
+        "temperature": f"{period.get('temperature')}°{period.get('temperatureUnit', '')}",
+        "wind": " ".join(filter(None, (period.get("windSpeed"), period.get("windDirection")))),
+        "precipitation": (period.get("probabilityOfPrecipitation") or {}).get("value"),
+        # Periods without a short forecast fall back to the detailed one
+        "forecast": period.get("shortForecast") or period.get("detailedForecast"),
+        "detailedForecast": period.get("detailedForecast"),
+    }
+    return {field: values[field] for field in fields if values[field] not in (None, "")}
+
+
+def compact_periods(periods: list[dict], fields: list[str] | None = None) -> list[dict[str, Any]]:
+    """Forecast periods as short dicts of the requested fields."""
+    fields = select_fields(fields, PERIOD_FIELDS, DEFAULT_PERIOD_FIELDS)
+    return [compact_period(period, fields) for period in periods]
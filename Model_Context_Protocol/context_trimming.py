@@ -0,0 +1,143 @@
+import json
+import math
+from collections import OrderedDict
+from typing import Callable, Sequence
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage, trim_messages
+
+CHARS_PER_TOKEN = 4
+# Fixed per-message cost for role markers and message framing
+MESSAGE_OVERHEAD_TOKENS = 4
+SECTION_SEPARATOR = "\n---\n"
+# Per-message cache entries kept (LRU), so a long-running host doesn't grow without bound
+CACHE_SIZE = 10000
+
+
+def approximate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def message_text(message: BaseMessage) -> str:
+    """All the text a message contributes to the prompt, including tool-call arguments."""
+    if isinstance(message.content, str):
+        text = message.content
+    else:
+        text = "".join(
+            block if isinstance(block, str) else str(block.get("text", "")) for block in message.content
+        )
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        text += json.dumps([{"name": call["name"], "args": call["args"]} for call in tool_calls])
+    return text
+
+
+class TokenCounter:
+    """Token counter for `trim_messages` that caches the count of every message it has seen.
+
+    Messages in graph state carry stable IDs, so on each turn only the newly added messages
+    are actually counted.
+    """
+
+    def __init__(self, count_text: Callable[[str], int] = approximate_tokens, max_entries: int = CACHE_SIZE):
+        self.count_text = count_text
+        self.max_entries = max_entries
+        self._counts: OrderedDict[str, int] = OrderedDict()
+
+    def __call__(self, messages: Sequence[BaseMessage]) -> int:
+        return sum(self.count(message) for message in messages)
+
+    def count(self, message: BaseMessage) -> int:
+        if message.id is not None and message.id in self._counts:
+            self._counts.move_to_end(message.id)
+            return self._counts[message.id]
+        tokens = self.count_text(message_text(message)) + MESSAGE_OVERHEAD_TOKENS
+        if message.id is not None:
+            self._counts[message.id] = tokens
+            if len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+        return tokens
+
+
+def compress_text(text: str, max_tokens: int, count_text: Callable[[str], int] = approximate_tokens) -> str:
+    """Shrink `text` to about `max_tokens`.
+
+    Tool outputs made of sections separated by "---" (e.g. an alert dump) keep as many
+    whole leading sections as fit; anything else is cut at the budget.
+    """
+    total = count_text(text)
+    if total <= max_tokens:
+        return text
+
+    sections = text.split(SECTION_SEPARATOR)
+    kept, used = [], 0
+    for section in sections:
+        cost = count_text(section)
+        if used + cost > max_tokens:
+            break
+        kept.append(section)
+        used += cost
+    if kept:
+        omitted = len(sections) - len(kept)
+        return SECTION_SEPARATOR.join(kept) + f"{SECTION_SEPARATOR}[{omitted} more sections omitted to save context]"
+
+    cut = len(text) * max_tokens // total
+    return text[:cut] + f"\n[truncated, {total - max_tokens} more tokens omitted to save context]"
+
+
+class ContextTrimmer:
+    """Prepares conversation history for the model within a token budget.
+
+    Oversized ToolMessage payloads are compressed to `max_tool_tokens` first, then the
+    history is trimmed to the last `max_tokens` tokens, starting on a human message.
+    Token counts and compressed tool messages are cached per message ID.
+
+    The result is only meant as model input (e.g. `llm_input_messages`): compressed copies
+    carry new IDs, so writing them back to graph state would duplicate the tool results.
+    """
+
+    def __init__(self, max_tokens: int, max_tool_tokens: int,
+                 count_text: Callable[[str], int] = approximate_tokens):
+        self.max_tool_tokens = max_tool_tokens
+        self.counter = TokenCounter(count_text)
+        self._compressed: OrderedDict[str, ToolMessage] = OrderedDict()
+        self.trimmer = trim_messages(
+            max_tokens=max_tokens,
+            strategy="last",
+            token_counter=self.counter,
+            include_system=True,
+            allow_partial=False,
+            start_on="human",
+        )
+
+    def __call__(self, messages: Sequence[BaseMessage]) -> list[BaseMessage]:
+        compressed = [self._compress(message) for message in messages]
+        trimmed = self.trimmer.invoke(compressed)
+        if not any(isinstance(message, HumanMessage) for message in trimmed):
+            # The current turn alone is over budget: keep it rather than drop the question
+            last_human = max((i for i, m in enumerate(compressed) if isinstance(m, HumanMessage)), default=0)
+            system = [m for m in compressed[:1] if isinstance(m, SystemMessage)]
+            trimmed = system + compressed[last_human:]
+        return trimmed
+
+    def pre_model_hook(self, state: dict) -> dict:
+        """`create_react_agent` pre-model hook: trim what the model sees without rewriting the agent state."""
+        return {"llm_input_messages": self(state["messages"])}
+
+    def _compress(self, message: BaseMessage) -> BaseMessage:
+        if not isinstance(message, ToolMessage):
+            return message
+        if message.id is not None and message.id in self._compressed:
+            self._compressed.move_to_end(message.id)
+            return self._compressed[message.id]
+        if self.counter.count(message) - MESSAGE_OVERHEAD_TOKENS <= self.max_tool_tokens:
+            compressed = message
+        else:
+            text = compress_text(message_text(message), self.max_tool_tokens, self.counter.count_text)
+            # A new ID so the cached token count of the full payload isn't reused
+            compressed = message.model_copy(update={"content": text, "id": f"{message.id}-compressed" if message.id else None})
+        if message.id is not None:
+            self._compressed[message.id] = compressed
+            if len(self._compressed) > CACHE_SIZE:
+                self._compressed.popitem(last=False)
+        return compressed
@@ -0,0 +1,199 @@
+"""Serve many conversations from one client process.
+
+Requests and responses are JSON lines:
+
+    {"id": 1, "session": "alice", "message": "Any weather alerts in CA?"}
+    {"id": 1, "session": "alice", "response": "..."}        (or "error": "...")
+
+Each session is a separate conversation (its `thread_id`). Responses are written as turns
+finish, so they can arrive out of order across sessions; match them by `id`.
+"""
+import asyncio
+import json
+import sys
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+
+class ConversationHost:
+    """Runs conversation turns from many sessions over one shared agent.
+
+    At most `max_concurrency` turns run at once overall and at most `per_session_limit`
+    per session (1 keeps each conversation's turns in order). Sessions with queued turns
+    are served round-robin, so a session that sends many messages can't starve the others.
+    """
+
+    def __init__(self, run_turn: Callable[[str, str], Awaitable[Any]], max_concurrency: int = 8,
+                 per_session_limit: int = 1):
+        self.run_turn = run_turn
+        self.max_concurrency = max_concurrency
+        self.per_session_limit = per_session_limit
+        self._queues: dict[str, deque[tuple[str, asyncio.Future]]] = {}
+        self._running: dict[str, int] = {}
+        self._ready: deque[str] = deque()
+        self._in_ready: set[str] = set()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._wakeup = asyncio.Event()
+        self._tasks: set[asyncio.Task] = set()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    async def submit(self, session_id: str, message: str) -> Any:
+        """Queue a turn for a session and wait for its response."""
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(session_id, deque()).append((message, future))
+        self._mark_ready(session_id)
+        return await future
+
+    async def close(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _dispatch(self) -> None:
+        while True:
+            await self._slots.acquire()
+            while not self._ready:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            session_id = self._ready.popleft()
+            self._in_ready.discard(session_id)
+            message, future = self._queues[session_id].popleft()
+            if future.done():
+                # The requester went away before the turn started
+                self._slots.release()
+                self._finish(session_id)
+                continue
+            self._running[session_id] = self._running.get(session_id, 0) + 1
+            # Back of the line: other sessions get their turn first
+            self._mark_ready(session_id)
+            task = asyncio.create_task(self._run(session_id, message, future))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, session_id: str, message: str, future: asyncio.Future) -> None:
+        try:
+            result = await self.run_turn(session_id, message)
+            if not future.done():
+                future.set_result(result)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self._running[session_id] -= 1
+            self._slots.release()
+            self._finish(session_id)
+
+    def _mark_ready(self, session_id: str) -> None:
+        if (session_id not in self._in_ready and self._queues.get(session_id)
+                and self._running.get(session_id, 0) < self.per_session_limit):
+            self._ready.append(session_id)
+            self._in_ready.add(session_id)
+            self._wakeup.set()
+
+    def _finish(self, session_id: str) -> None:
+        self._mark_ready(session_id)
+        # Forget idle sessions so the host doesn't grow with every session it has seen
+        if not self._queues.get(session_id) and not self._running.get(session_id):
+            self._queues.pop(session_id, None)
+            self._running.pop(session_id, None)
+
+    # -- transports -----------------------------------------------------------
+
+    async def serve_stream(self, read_line: Callable[[], Awaitable[str]],
+                           write_line: Callable[[str], Awaitable[None]]) -> None:
+        """Handle JSONL requests until `read_line` returns an empty string (EOF)."""
+        pending: set[asyncio.Task] = set()
+
+        async def handle(request: Any) -> None:
+            reply: dict[str, Any] = {"id": None, "session": None}
+            try:
+                if not isinstance(request, dict):
+                    raise ValueError("Request must be a JSON object")
+                reply.update(id=request.get("id"), session=request.get("session"))
+                if request.get("session") is None or request.get("message") is None:
+                    raise ValueError("Request needs 'session' and 'message'")
+                reply["response"] = await self.submit(str(request["session"]), request["message"])
+            except Exception as e:
+                reply["error"] = str(e)
+            await write_line(json.dumps(reply, default=str))
+
+        while line := await read_line():
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                await write_line(json.dumps({"error": f"Invalid JSON: {e}"}))
+                continue
+            task = asyncio.create_task(handle(request))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        await asyncio.gather(*pending)
+
+    async def serve_stdio(self) -> None:
+        """JSONL over stdin/stdout. Anything else the client prints goes to stderr meanwhile."""
+        write_lock = asyncio.Lock()
+        out, sys.stdout = sys.stdout, sys.stderr
+
+        async def read_line() -> str:
+            # A thread keeps this portable (no pipe support for stdin on Windows' event loop)
+            return await asyncio.to_thread(sys.stdin.readline)
+
+        async def write_line(line: str) -> None:
+            async with write_lock:
+                out.write(line + "\n")
+                out.flush()
+
+        try:
+            await self.serve_stream(read_line, write_line)
+        finally:
+            sys.stdout = out
+
+    async def serve_socket(self, port: int, host: str = "127.0.0.1") -> None:
+        """JSONL over TCP; each connection can carry any number of sessions."""
+        async def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            write_lock = asyncio.Lock()
+
+            async def read_line() -> str:
+                return (await reader.readline()).decode()
+
+            async def write_line(line: str) -> None:
+                async with write_lock:
+                    writer.write(line.encode() + b"\n")
+                    await writer.drain()
+
+            try:
+                await self.serve_stream(read_line, write_line)
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(on_connect, host, port)
+        print(f"Conversation host listening on {host}:{port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    async def serve(self, port: Optional[int] = None) -> None:
+        """Serve on a local TCP port, or over stdin/stdout when no port is given."""
+        try:
+            if port is None:
+                await self.serve_stdio()
+            else:
+                await self.serve_socket(port)
+        finally:
+            await self.close()
+
+
+def parse_serve_args(argv: list[str]) -> tuple[bool, Optional[int]]:
+    """Parse the clients' optional `--serve [PORT]` argument."""
+    if "--serve" not in argv:
+        return False, None
+    index = argv.index("--serve")
+    port = argv[index + 1] if index + 1 < len(argv) else None
+    return True, int(port) if port and port.isdigit() else None
@@ -0,0 +1,272 @@
+import asyncio
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import httpx
+
+# Methods that are safe to send twice (retried after any failure, and hedged)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Statuses worth retrying: rate limiting and transient server/gateway errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class UpstreamError(Exception):
+    """An upstream request that failed. `str()` is a short message fit to show a user."""
+
+    def __init__(self, message: str, url: str, status: int | None = None):
+        super().__init__(message)
+        self.url = url
+        self.status = status
+
+
+class UpstreamTimeout(UpstreamError):
+    """The upstream didn't connect or respond within its deadline."""
+
+
+class UpstreamUnavailable(UpstreamError):
+    """The upstream couldn't be reached, or its circuit breaker is open."""
+
+
+class UpstreamStatusError(UpstreamError):
+    """The upstream answered with an error status."""
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of sending a request to a host whose circuit breaker is open."""
+
+
+def upstream_error(exc: Exception, url: str) -> UpstreamError:
+    """Map an exception raised while fetching `url` to the matching `UpstreamError`."""
+    host = httpx.URL(url).host
+    if isinstance(exc, UpstreamError):
+        return exc
+    if isinstance(exc, CircuitOpenError):
+        return UpstreamUnavailable(f"{host} is failing; not retrying for now", url)
+    if isinstance(exc, httpx.ConnectTimeout):
+        return UpstreamTimeout(f"Timed out connecting to {host}", url)
+    if isinstance(exc, httpx.TimeoutException):
+        return UpstreamTimeout(f"{host} did not respond in time", url)
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return UpstreamStatusError(f"{host} returned HTTP {status}", url, status)
+    if isinstance(exc, httpx.TransportError):
+        return UpstreamUnavailable(f"Could not reach {host}", url)
+    return UpstreamError(f"Unexpected response from {host}", url)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one host.
+
+    After `failure_threshold` failures in a row the circuit opens and requests fail fast.
+    Once `reset_timeout` seconds have passed, one probe request is let through
+    (half-open): its success closes the circuit, and its failure opens it again. Every
+    request let through must end in `record_success`, `record_failure` or `release`.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._probing or time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self._probing or time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self) -> None:
+        """Settle a request that ended without telling whether the host is healthy (e.g. it was cancelled).
+
+        A probe settled this way opens the circuit again, so the next probe is sent a full
+        `reset_timeout` later; in the closed state this changes nothing.
+        """
+        if self._probing:
+            self._probing = False
+            self.opened_at = time.monotonic()
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """httpx transport wrapper applying the upstream fetch policy.
+
+    - Failed requests are retried up to `retries` times with full-jitter exponential
+      backoff (base `backoff`, capped at `backoff_max`, or the server's `Retry-After`).
+      Idempotent requests are retried after timeouts, connection errors and
+      RETRY_STATUSES; other methods only after failing to connect.
+    - Each host has a `CircuitBreaker`; while it is open, requests raise `CircuitOpenError`
+      without being sent. Timeouts, connection errors and 5xx responses count as failures;
+      any other response, including a 429 (the host is up but throttling), as a success.
+    - With `hedge`, an idempotent request still unanswered after the host's recent p95
+      latency (at least `hedge_min_delay`) is sent a second time, and the first response wins.
+
+    `stats` counts retries, hedged requests, hedges that won and breaker rejections.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, retries: int = 2, backoff: float = 0.2,
+                 backoff_max: float = 2.0, failure_threshold: int = 5, reset_timeout: float = 30,
+                 hedge: bool = False, hedge_min_delay: float = 0.05, latency_window: int = 200):
+        self.transport = transport
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.latency_window = latency_window
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self._latencies: dict[str, deque[float]] = {}
+        self.stats = {"retries": 0, "hedged": 0, "hedge_wins": 0, "rejected": 0}
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            **self.stats,
+            "hosts": {
+                host: {"circuit": breaker.state, "failures": breaker.failures, "hedge_after_ms": self._hedge_delay_ms(host)}
+                for host, breaker in self.breakers.items()
+            },
+        }
+
+    def _hedge_delay(self, host: str) -> float | None:
+        """The host's recent p95 response time, or None until there are enough samples."""
+        latencies = self._latencies.get(host)
+        if not latencies or len(latencies) < 20:
+            return None
+        return max(sorted(latencies)[int(len(latencies) * 0.95)], self.hedge_min_delay)
+
+    def _hedge_delay_ms(self, host: str) -> float | None:
+        delay = self._hedge_delay(host)
+        return round(delay * 1000, 1) if delay is not None else None
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        breaker = self.breaker(host)
+        idempotent = request.method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(f"Circuit open for {host}", request=request)
+            response = None
+            settled = False
+            try:
+                response = await self._send(request, host, hedge=self.hedge and idempotent)
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                settled = True
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                settled = True
+                if attempt >= self.retries or not (idempotent or isinstance(e, httpx.ConnectError)):
+                    raise
+            finally:
+                if not settled:
+                    # Cancelled or failed unexpectedly: don't leave a half-open probe outstanding
+                    breaker.release()
+
+            if response is None:
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries or not idempotent:
+                    return response
+                retry_after = _retry_after(response)
+                delay = min(retry_after, self.backoff_max) if retry_after is not None else self._backoff(attempt)
+                await response.aclose()
+            attempt += 1
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    async def _send(self, request: httpx.Request, host: str, hedge: bool) -> httpx.Response:
+        start = time.perf_counter()
+        delay = self._hedge_delay(host) if hedge else None
+        if delay is None:
+            response = await self.transport.handle_async_request(request)
+        else:
+            response = await self._send_hedged(request, delay)
+        latencies = self._latencies.get(host)
+        if latencies is None:
+            latencies = self._latencies[host] = deque(maxlen=self.latency_window)
+        latencies.append(time.perf_counter() - start)
+        return response
+
+    async def _send_hedged(self, request: httpx.Request, delay: float) -> httpx.Response:
+        first = asyncio.ensure_future(self.transport.handle_async_request(request))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.stats["hedged"] += 1
+                tasks.add(asyncio.ensure_future(self.transport.handle_async_request(request)))
+            error: BaseException | None = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winners = [task for task in done if task.exception() is None]
+                if winners:
+                    winner = first if first in winners else winners[0]
+                    self.stats["hedge_wins"] += winner is not first
+                    for task in winners:
+                        if task is not winner:
+                            await task.result().aclose()
+                    return winner.result()
+                error = next(iter(done)).exception()
+            raise error
+        finally:
+            # Abandon the slower request (or both, if the caller was cancelled)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for task in tasks:
+                if not task.cancelled() and task.exception() is None:
+                    await task.result().aclose()
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
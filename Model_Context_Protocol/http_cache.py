@@ -0,0 +1,154 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import httpx
+
+
+@dataclass
+class CacheEntry:
+    body: Any
+    etag: str | None
+    last_modified: str | None
+    fresh_until: float
+    stale_until: float
+
+
+def _parse_cache_control(value: str) -> dict[str, str | None]:
+    directives: dict[str, str | None] = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') or None
+    return directives
+
+
+def _http_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class ResponseCache:
+    """HTTP response cache for JSON GET requests.
+
+    - Freshness comes from the `Cache-Control` (`max-age`, `s-maxage`) or `Expires` headers,
+      falling back to `default_ttl`.
+    - Expired entries are revalidated with `If-None-Match` / `If-Modified-Since`, so an
+      unchanged resource costs a 304 instead of a full download and re-parse.
+    - For `stale_ttl` seconds after expiry (or the server's `stale-while-revalidate`), the
+      stale body is returned immediately and refreshed in the background. `no-cache` and
+      `must-revalidate` responses are only served stale under `stale-while-revalidate`.
+
+    `stats` counts hits, misses, stale hits, revalidations and 304s.
+    """
+
+    def __init__(self, max_entries: int = 256, default_ttl: float = 0, stale_ttl: float = 60):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.stats = {"hits": 0, "misses": 0, "stale_hits": 0, "revalidations": 0, "not_modified": 0}
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._refreshing: dict[str, asyncio.Task] = {}
+
+    async def get_json(self, client: httpx.AsyncClient, url: str, headers: dict[str, str] | None = None) -> Any:
+        """GET `url` and return the parsed JSON body, from cache when possible."""
+        headers = headers or {}
+        key = f"{headers.get('Accept', '')} {url}"
+        entry = self._entries.get(key)
+        now = time.time()
+
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if now < entry.fresh_until:
+                self.stats["hits"] += 1
+                return entry.body
+            if now < entry.stale_until:
+                self.stats["stale_hits"] += 1
+                if key not in self._refreshing:
+                    task = asyncio.create_task(self._refresh(client, key, url, headers, entry))
+                    self._refreshing[key] = task
+                    task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+                return entry.body
+
+        return await self._fetch(client, key, url, headers, entry)
+
+    async def _refresh(self, client: httpx.AsyncClient, key: str, url: str,
+                       headers: dict[str, str], entry: CacheEntry) -> None:
+        try:
+            await self._fetch(client, key, url, headers, entry)
+        except Exception:
+            # Keep serving the stale body; the next expired read will try again
+            pass
+
+    async def _fetch(self, client: httpx.AsyncClient, key: str, url: str,
+                     headers: dict[str, str], entry: CacheEntry | None) -> Any:
+        request_headers = dict(headers)
+        if entry is not None and (entry.etag or entry.last_modified):
+            self.stats["revalidations"] += 1
+            if entry.etag:
+                request_headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request_headers["If-Modified-Since"] = entry.last_modified
+        else:
+            self.stats["misses"] += 1
+
+        response = await client.get(url, headers=request_headers)
+        if response.status_code == 304 and entry is not None:
+            self.stats["not_modified"] += 1
+            body = entry.body
+        else:
+            response.raise_for_status()
+            body = response.json()
+        self._store(key, response, body, entry)
+        return body
+
+    def _store(self, key: str, response: httpx.Response, body: Any, previous: CacheEntry | None) -> None:
+        directives = _parse_cache_control(response.headers.get("Cache-Control", ""))
+        if "no-store" in directives:
+            self._entries.pop(key, None)
+            return
+
+        now = time.time()
+        ttl = self.default_ttl
+        max_age = directives.get("s-maxage") or directives.get("max-age")
+        if "no-cache" in directives:
+            ttl = 0
+        elif max_age is not None and max_age.isdigit():
+            ttl = int(max_age) - int(response.headers.get("Age", "0") or 0)
+        else:
+            expires = _http_date(response.headers.get("Expires"))
+            if expires is not None:
+                ttl = expires - (_http_date(response.headers.get("Date")) or now)
+        ttl = max(ttl, 0)
+
+        swr = directives.get("stale-while-revalidate")
+        if swr is not None and swr.isdigit():
+            stale_ttl = int(swr)
+        elif "no-cache" in directives or "must-revalidate" in directives:
+            # The server wants these revalidated before reuse
+            stale_ttl = 0
+        else:
+            stale_ttl = self.stale_ttl
+
+        # A 304 may omit validators; keep the ones we already had
+        etag = response.headers.get("ETag") or (previous.etag if previous else None)
+        last_modified = response.headers.get("Last-Modified") or (previous.last_modified if previous else None)
+        self._entries[key] = CacheEntry(body, etag, last_modified, now + ttl, now + ttl + stale_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def close(self) -> None:
+        """Cancel any background revalidations still in flight."""
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refreshing.clear()
@@ -0,0 +1,60 @@
+import json
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from llm_cache import LLMCacheStore, canonical_key, llm_cache_from_env
+
+# Message fields that differ between otherwise identical runs and aren't sent to the model
+_VOLATILE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+
+def _strip_volatile(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_strip_volatile(item) for item in value]
+    if isinstance(value, dict):
+        stripped = {key: _strip_volatile(item) for key, item in value.items()}
+        if isinstance(stripped.get("kwargs"), dict):
+            for field in _VOLATILE_FIELDS:
+                stripped["kwargs"].pop(field, None)
+        return stripped
+    return value
+
+
+class LangChainLLMCache(BaseCache):
+    """LangChain chat model cache backed by an `LLMCacheStore`.
+
+    Pass it as `cache=` to a chat model. Requests are keyed on the messages (without their
+    run-specific IDs and response metadata) plus the model's configuration and bound tools.
+    """
+
+    def __init__(self, store: LLMCacheStore):
+        self.store = store
+
+    @staticmethod
+    def key(prompt: str, llm_string: str) -> str:
+        return canonical_key({"messages": _strip_volatile(json.loads(prompt)), "llm": llm_string})
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.store.get(self.key(prompt, llm_string))
+        return loads(value) if value is not None else None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        generations = []
+        for generation in return_val:
+            message = getattr(generation, "message", None)
+            if message is not None:
+                # Replays get a fresh ID from the run, so they don't collide in graph state
+                generation = generation.model_copy(update={"message": message.model_copy(update={"id": None})})
+            generations.append(generation)
+        self.store.put(self.key(prompt, llm_string), dumps(generations))
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear()
+
+
+def langchain_cache_from_env() -> Optional[LangChainLLMCache]:
+    """The cache configured by LLM_CACHE_MODE / LLM_CACHE_PATH, or None when caching is off."""
+    store = llm_cache_from_env()
+    return LangChainLLMCache(store) if store is not None else None
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, AsyncIterator, Optional
+
+from model_backends import ModelBackend
+
+# off: no caching; record: replay cached responses and record new ones; replay: cached responses only
+LLM_CACHE_MODES = ("off", "record", "replay")
+
+
+class CacheMissError(LookupError):
+    """Raised in replay mode when a model request has no recorded response."""
+
+
+def canonical_key(payload: Any) -> str:
+    """Stable hash of a JSON-like request: dict key order and whitespace don't matter."""
+    text = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class LLMCacheStore:
+    """Recorded model responses keyed by request hash, kept in a local JSON-lines file.
+
+    The whole file is loaded on start; new recordings are appended as they happen, so a
+    recording survives an interrupted run.
+    """
+
+    def __init__(self, path: str, mode: str = "record"):
+        if mode not in LLM_CACHE_MODES:
+            raise ValueError(f"LLM cache mode must be one of {LLM_CACHE_MODES}, not {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry["value"]
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the recorded value, or None on a miss (CacheMissError in replay mode)."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self.stats["hits"] += 1
+                return value
+            self.stats["misses"] += 1
+        if self.mode == "replay":
+            raise CacheMissError(f"No recorded model response for request {key[:12]} in {self.path}")
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        if self.mode != "record":
+            return
+        with self._lock:
+            self._entries[key] = value
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n")
+
+    def clear(self) -> None:
+        """Forget every recorded response and truncate the file."""
+        with self._lock:
+            self._entries.clear()
+            open(self.path, "w", encoding="utf-8").close()
+
+
+def llm_cache_from_env() -> Optional[LLMCacheStore]:
+    """The store configured by LLM_CACHE_MODE / LLM_CACHE_PATH, or None when caching is off."""
+    mode = os.getenv("LLM_CACHE_MODE", "off").lower()
+    if mode == "off":
+        return None
+    return LLMCacheStore(os.getenv("LLM_CACHE_PATH", "llm_cache.jsonl"), mode)
+
+
+class CachingBackend:
+    """ModelBackend wrapper that records and replays Converse stream events.
+
+    Requests are keyed on the canonical hash of all `converse_stream` arguments (model,
+    messages, system prompt, tool specs and inference config). A hit replays the recorded
+    events immediately, so cached turns cost no model latency.
+    """
+
+    def __init__(self, backend: ModelBackend, store: LLMCacheStore):
+        self.backend = backend
+        self.store = store
+
+    async def converse_stream(self, **kwargs: Any) -> AsyncIterator[dict]:
+        key = canonical_key(kwargs)
+        events = self.store.get(key)
+        if events is not None:
+            for event in events:
+                yield event
+            return
+
+        events = []
+        async for event in self.backend.converse_stream(**kwargs):
+            events.append(event)
+            yield event
+        self.store.put(key, events)
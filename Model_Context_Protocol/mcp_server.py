@@ -1,35 +1,368 @@
-from typing import Any
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import asynccontextmanager
 import httpx
 from mcp.server.fastmcp import FastMCP
-from tavily import TavilyClient
-import requests
-from pprint import pprint
+from mcp.server.fastmcp.exceptions import ToolError
+from pydantic import BaseModel
 import os
 from dotenv import load_dotenv
+from points_cache import PointsCache
+from http_cache import ResponseCache
+from singleflight import SingleFlight, request_key
+from alert_index import AlertIndex
+from compact_output import (ALERT_FIELDS, DEFAULT_ALERT_FIELDS, DEFAULT_PERIOD_FIELDS, PERIOD_FIELDS, compact_alerts,
+                            compact_periods, select_fields, to_json)
+from alert_paging import page_alerts
+from metrics import InstrumentedTransport, Metrics, report_tool_error
+from fetch_policy import ResilientTransport, UpstreamError, upstream_error
+from tracing import TRACE_META_KEY
+from mcp.server.session import ServerSession
+from pydantic import AnyUrl
+import weakref
+import asyncio
+import json
 load_dotenv()
 
-# Initialize FastMCP server
-mcp = FastMCP("weather")
+if TYPE_CHECKING:
+    # Only needed by the tools that use them; imported on first use to keep server startup fast
+    from places_client import PlacesClient
+    from search_backend import SearchBackend
 
 # Constants
-NWS_API_BASE = "https://api.weather.gov"
+NWS_API_BASE = os.getenv('NWS_API_BASE', "https://api.weather.gov")
+PLACES_API_BASE = os.getenv('PLACES_API_BASE', "https://places.googleapis.com/v1")
 USER_AGENT = "weather-app/1.0"
+GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
+TAVILY_API_BASE = os.getenv('TAVILY_API_BASE', "https://api.tavily.com")
+TAVILY_API_KEY = os.getenv('TAVILY_API_KEY')
+
+# Connection pool settings for the shared HTTP client (override via .env)
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '100'))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '20'))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30'))
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '30'))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+
+# Upstream fetch policy: retries with jittered backoff, per-host circuit breaker, optional hedging
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '2'))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', '0.2'))
+HTTP_RETRY_BACKOFF_MAX = float(os.getenv('HTTP_RETRY_BACKOFF_MAX', '2'))
+HTTP_BREAKER_THRESHOLD = int(os.getenv('HTTP_BREAKER_THRESHOLD', '5'))
+HTTP_BREAKER_RESET = float(os.getenv('HTTP_BREAKER_RESET', '30'))
+HTTP_HEDGE = os.getenv('HTTP_HEDGE', 'false').lower() in ('1', 'true', 'yes')
+HTTP_HEDGE_MIN_DELAY = float(os.getenv('HTTP_HEDGE_MIN_DELAY', '0.05'))
+
+# Grid-point cache settings for get_forecast's /points lookup
+NWS_POINTS_PRECISION = int(os.getenv('NWS_POINTS_PRECISION', '4'))
+NWS_POINTS_TTL = float(os.getenv('NWS_POINTS_TTL', str(7 * 24 * 3600)))
+NWS_POINTS_CACHE_SIZE = int(os.getenv('NWS_POINTS_CACHE_SIZE', '1024'))
+NWS_POINTS_CACHE_DB = os.getenv('NWS_POINTS_CACHE_DB')
+
+# HTTP response cache settings for NWS requests
+NWS_CACHE_SIZE = int(os.getenv('NWS_CACHE_SIZE', '256'))
+NWS_CACHE_DEFAULT_TTL = float(os.getenv('NWS_CACHE_DEFAULT_TTL', '0'))
+NWS_CACHE_STALE_TTL = float(os.getenv('NWS_CACHE_STALE_TTL', '60'))
+
+# Places search cache: reuse results for the same query from an origin within PLACES_CACHE_MAX_SHIFT metres
+PLACES_CACHE_TTL = float(os.getenv('PLACES_CACHE_TTL', '3600'))
+PLACES_CACHE_SIZE = int(os.getenv('PLACES_CACHE_SIZE', '1024'))
+PLACES_CACHE_MAX_SHIFT = float(os.getenv('PLACES_CACHE_MAX_SHIFT', '250'))
+
+# Web search cache and concurrency settings
+SEARCH_CACHE_TTL = float(os.getenv('SEARCH_CACHE_TTL', '3600'))
+SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', '512'))
+SEARCH_MAX_CONCURRENCY = int(os.getenv('SEARCH_MAX_CONCURRENCY', '4'))
+
+# Optional national alert index: poll /alerts/active once and serve get_alerts from memory
+NWS_ALERT_INDEX = os.getenv('NWS_ALERT_INDEX', 'false').lower() in ('1', 'true', 'yes')
+NWS_ALERT_POLL_INTERVAL = float(os.getenv('NWS_ALERT_POLL_INTERVAL', '60'))
+
+# Compact JSON output for the weather tools: the default of their `compact` argument, and the
+# length descriptions and instructions are truncated to in compact mode
+TOOL_OUTPUT_COMPACT = os.getenv('TOOL_OUTPUT_COMPACT', 'false').lower() in ('1', 'true', 'yes')
+COMPACT_TEXT_CHARS = int(os.getenv('COMPACT_TEXT_CHARS', '200'))
+
+# Alerts per page of get_alerts_page and the alerts://{state}/page/{cursor} resource
+ALERT_PAGE_SIZE = int(os.getenv('ALERT_PAGE_SIZE', '10'))
+
+# Max concurrent upstream fetches per batch tool call
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))
+
+# Optional local port serving /metrics (Prometheus) and /metrics.json
+METRICS_PORT = int(os.getenv('METRICS_PORT')) if os.getenv('METRICS_PORT') else None
+
+# One long-lived client shared by every tool, so calls reuse pooled TCP/TLS connections
+# instead of paying a new handshake each time. Created in the server lifespan.
+http_client: httpx.AsyncClient | None = None
+
+# Retry/breaker/hedging layer of the shared client's transport (see create_http_client)
+fetch_policy: ResilientTransport | None = None
+
+points_cache = PointsCache(
+    precision=NWS_POINTS_PRECISION,
+    ttl=NWS_POINTS_TTL,
+    max_entries=NWS_POINTS_CACHE_SIZE,
+    db_path=NWS_POINTS_CACHE_DB,
+)
+
+response_cache = ResponseCache(
+    max_entries=NWS_CACHE_SIZE,
+    default_ttl=NWS_CACHE_DEFAULT_TTL,
+    stale_ttl=NWS_CACHE_STALE_TTL,
+)
+
+# Concurrent identical upstream requests (same method, URL, params and body) share one in-flight call
+upstream_flight = SingleFlight()
+
+# Latency/error stats of every tool and upstream call, plus cache counters and per-trace spans
+metrics = Metrics()
+metrics.register_cache("nws_response", response_cache.stats)
+metrics.register_cache("nws_points", points_cache.stats)
+metrics.register_cache("upstream_singleflight", upstream_flight.stats)
+
+# Places and web search clients, created on first use (see get_places_client / get_search_backend)
+places_client: "PlacesClient | None" = None
+search_backend: "SearchBackend | None" = None
+
+alert_index = AlertIndex()
+
+# Sessions subscribed to each alerts://{STATE} resource (see alert_subscription_key), notified when that
+# state's alerts change, mapped to the URI each one subscribed with
+alert_subscriptions: dict[str, weakref.WeakKeyDictionary[ServerSession, str]] = {}
+
+# St Paul's Cathedral, the Places tools' default origin
+CURRENT_LAT = 51.513446
+CURRENT_LNG = -0.099869
+
+def classify_upstream(url: httpx.URL) -> str:
+    """Name an upstream request is reported under in the metrics, e.g. `nws:points` or `tavily`."""
+    url = str(url)
+    if url.startswith(NWS_API_BASE):
+        return "nws:" + url[len(NWS_API_BASE):].lstrip("/").split("/", 1)[0]
+    if url.startswith(PLACES_API_BASE):
+        return "places"
+    if url.startswith(TAVILY_API_BASE):
+        return "tavily"
+    return httpx.URL(url).host
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build the pooled HTTP client used for all upstream API calls.
+
+    Requests go through `fetch_policy` (retries, circuit breaker, hedging), and every attempt
+    is timed into `metrics`. HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`).
+    """
+    global fetch_policy
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    transport = httpx.AsyncHTTPTransport(limits=limits, http2=HTTP2_ENABLED)
+    fetch_policy = ResilientTransport(
+        InstrumentedTransport(transport, metrics, classify_upstream),
+        retries=HTTP_RETRIES,
+        backoff=HTTP_RETRY_BACKOFF,
+        backoff_max=HTTP_RETRY_BACKOFF_MAX,
+        failure_threshold=HTTP_BREAKER_THRESHOLD,
+        reset_timeout=HTTP_BREAKER_RESET,
+        hedge=HTTP_HEDGE,
+        hedge_min_delay=HTTP_HEDGE_MIN_DELAY,
+    )
+    return httpx.AsyncClient(
+        headers={"User-Agent": USER_AGENT},
+        # A slow or unreachable replica fails within these deadlines and is retried
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT, read=HTTP_READ_TIMEOUT),
+        transport=fetch_policy,
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it if the lifespan has not run (e.g. direct calls)."""
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+    return http_client
+
+shared_resources_open = False
+
+@asynccontextmanager
+async def shared_resources() -> AsyncIterator[None]:
+    """Open the shared HTTP client (and the alert index poller and metrics endpoint, if enabled) on startup; close them on shutdown."""
+    global http_client, shared_resources_open
+    http_client = create_http_client()
+    poller = asyncio.create_task(poll_alert_index()) if NWS_ALERT_INDEX else None
+    metrics_server = await metrics.serve(METRICS_PORT) if METRICS_PORT else None
+    shared_resources_open = True
+    try:
+        yield
+    finally:
+        shared_resources_open = False
+        if metrics_server is not None:
+            metrics_server.close()
+        if poller is not None:
+            poller.cancel()
+            await asyncio.gather(poller, return_exceptions=True)
+        await response_cache.close()
+        await http_client.aclose()
+        http_client = None
+        points_cache.close()
+
+def get_places_client() -> "PlacesClient":
+    global places_client
+    if places_client is None:
+        from places_client import PlacesClient
+        from places_cache import PlacesCache
+        cache = PlacesCache(max_shift_m=PLACES_CACHE_MAX_SHIFT, ttl=PLACES_CACHE_TTL, max_entries=PLACES_CACHE_SIZE)
+        places_client = PlacesClient(GOOGLE_API_KEY, get_http_client, base_url=PLACES_API_BASE,
+                                     flight=upstream_flight, cache=cache)
+        metrics.register_cache("places", cache.stats)
+    return places_client
+
+def get_search_backend() -> "SearchBackend":
+    global search_backend
+    if search_backend is None:
+        from search_backend import SearchBackend
+        search_backend = SearchBackend(
+            TAVILY_API_KEY,
+            get_http_client,
+            base_url=TAVILY_API_BASE,
+            ttl=SEARCH_CACHE_TTL,
+            max_entries=SEARCH_CACHE_SIZE,
+            max_concurrency=SEARCH_MAX_CONCURRENCY,
+            flight=upstream_flight,
+        )
+        metrics.register_cache("search", search_backend.stats)
+    return search_backend
+
+@asynccontextmanager
+async def server_lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Per-session lifespan.
+
+    Over stdio the process serves a single session, so the session owns the shared resources.
+    Over HTTP every client connection runs this lifespan; there the resources are opened once by
+    the ASGI app (see create_app) and shared by all sessions, so this is a no-op.
+    """
+    if shared_resources_open:
+        yield
+        return
+    async with shared_resources():
+        yield
+
+# Initialize FastMCP server
+mcp = FastMCP("weather", lifespan=server_lifespan)
 
-async def make_nws_request(url: str) -> dict[str, Any] | None:
-    """Make a request to the NWS API with proper error handling."""
+def request_trace_id() -> str | None:
+    """Trace ID the client sent in the current request's `_meta`, if any."""
+    try:
+        meta = mcp._mcp_server.request_context.meta
+    except LookupError:
+        return None
+    return getattr(meta, TRACE_META_KEY, None) if meta is not None else None
+
+def instrumented_tool(*args, **kwargs):
+    """`mcp.tool()` that also records the tool's latency and errors in `metrics`."""
+    def decorator(fn):
+        return mcp.tool(*args, **kwargs)(metrics.instrument_tool(fn, request_trace_id))
+    return decorator
+
+def tool_failure(message: str) -> str:
+    """`message` as a tool's result, with the call counted as an error in `metrics`."""
+    report_tool_error()
+    return message
+
+async def make_nws_request(url: str) -> dict[str, Any]:
+    """Make a request to the NWS API.
+
+    Raises an `UpstreamError` (timeout, unavailable or error status) if it fails after retries.
+    """
     headers = {
-        "User-Agent": USER_AGENT,
         "Accept": "application/geo+json"
     }
 
-    #httpx.AsyncClient helps to process multiple concurrent requests. It is always used under a async function.
-    async with httpx.AsyncClient() as client:
+    # Served from the response cache when fresh; otherwise revalidated with ETag/Last-Modified.
+    # Concurrent callers for the same URL wait on a single fetch.
+    try:
+        return await upstream_flight.do(
+            request_key("GET", url),
+            lambda: response_cache.get_json(get_http_client(), url, headers),
+        )
+    except Exception as e:
+        raise upstream_error(e, url) from e
+
+async def poll_alert_index() -> None:
+    """Keep the alert index in sync with the national active-alert feed."""
+    last_feed = None
+    while True:
         try:
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
-        except Exception:
-            return None
+            data = await make_nws_request(f"{NWS_API_BASE}/alerts/active")
+        except UpstreamError:
+            # Keep serving the last feed; the next poll tries again
+            data = None
+        # An unchanged feed (304 from the response cache) comes back as the same object; skip the diff
+        if data and "features" in data and data is not last_feed:
+            last_feed = data
+            changed_states = alert_index.apply(data["features"])
+            await notify_alert_subscribers(changed_states)
+        await asyncio.sleep(NWS_ALERT_POLL_INTERVAL)
+
+def alert_subscription_key(uri: str) -> str:
+    """`uri` with an alerts://{state} state upper-cased, as the alert index reports changed states."""
+    scheme, _, state = uri.partition("://")
+    if scheme == "alerts" and state and "/" not in state:
+        return f"alerts://{state.upper()}"
+    return uri
+
+async def notify_alert_subscribers(states: set[str]) -> None:
+    """Send resources/updated for alerts://{state} to every session subscribed to a changed state."""
+    for state in states:
+        subscribers = alert_subscriptions.get(alert_subscription_key(f"alerts://{state}"), {})
+        for session, uri in list(subscribers.items()):
+            try:
+                await session.send_resource_updated(AnyUrl(uri))
+            except Exception:
+                subscribers.pop(session, None)
+
+@mcp._mcp_server.subscribe_resource()
+async def subscribe_resource(uri: AnyUrl) -> None:
+    session = mcp._mcp_server.request_context.session
+    alert_subscriptions.setdefault(alert_subscription_key(str(uri)), weakref.WeakKeyDictionary())[session] = str(uri)
+
+@mcp._mcp_server.unsubscribe_resource()
+async def unsubscribe_resource(uri: AnyUrl) -> None:
+    session = mcp._mcp_server.request_context.session
+    alert_subscriptions.get(alert_subscription_key(str(uri)), {}).pop(session, None)
+
+# mcp 1.7.1 always advertises resources.subscribe=False; we handle subscriptions, so say so
+_get_capabilities = mcp._mcp_server.get_capabilities
+
+def get_capabilities(*args, **kwargs):
+    capabilities = _get_capabilities(*args, **kwargs)
+    if capabilities.resources is not None:
+        capabilities.resources.subscribe = True
+    return capabilities
+
+mcp._mcp_server.get_capabilities = get_capabilities
+
+@mcp.resource("stats://http-cache")
+def http_cache_stats() -> str:
+    """Hit/miss/revalidation counters of the NWS response cache."""
+    return json.dumps(response_cache.stats)
+
+@mcp.resource("stats://upstream")
+def upstream_stats() -> str:
+    """Retry/hedge counters and the circuit breaker state of each upstream host."""
+    return json.dumps(fetch_policy.snapshot() if fetch_policy is not None else {})
+
+@mcp.resource("stats://metrics")
+def server_metrics() -> str:
+    """Latency histograms, error/timeout counts and payload sizes per tool and upstream, plus cache hit rates."""
+    return json.dumps(metrics.snapshot())
+
+@mcp.resource("traces://{trace_id}")
+def trace_spans(trace_id: str) -> str:
+    """Tool and upstream spans recorded for a trace ID sent by the client in a tool call's `_meta`."""
+    return json.dumps(metrics.trace(trace_id))
 
 def format_alert(feature: dict) -> str:
     """Format an alert feature into a readable string."""
@@ -42,109 +375,297 @@ Description: {props.get('description', 'No description available')}
 Instructions: {props.get('instruction', 'No specific instructions provided')}
 """
 
-@mcp.tool()
-async def get_alerts(state: str) -> str:
+def alert_matches(feature: dict, severity: str | None, event: str | None) -> bool:
+    props = feature["properties"]
+    if severity and str(props.get('severity', '')).lower() != severity.lower():
+        return False
+    if event and str(props.get('event', '')).lower() != event.lower():
+        return False
+    return True
+
+def tool_fields(fields: list[str] | None, allowed: tuple[str, ...], default: tuple[str, ...]) -> list[str]:
+    """The compact-mode fields a tool was asked for; unknown ones are reported as a ToolError."""
+    try:
+        return select_fields(fields, allowed, default)
+    except ValueError as e:
+        raise ToolError(str(e)) from e
+
+async def iter_alerts(state: str, severity: str | None = None, event: str | None = None) -> Iterator[dict]:
+    """Fetch a US state's active alerts and return them lazily, optionally filtered by severity and event type."""
+    if alert_index.loaded:
+        return iter(alert_index.query(state=state, severity=severity, event=event))
+
+    url = f"{NWS_API_BASE}/alerts/active/area/{state}"
+    try:
+        data = await make_nws_request(url)
+    except UpstreamError as e:
+        raise ToolError(f"Unable to fetch alerts: {e}.") from e
+
+    if "features" not in data:
+        raise ToolError("Unable to fetch alerts or no alerts found.")
+
+    return (feature for feature in data["features"] if alert_matches(feature, severity, event))
+
+async def fetch_alerts(state: str, severity: str | None = None, event: str | None = None) -> list[dict]:
+    """Fetch the active alert features for a US state, optionally filtered by severity and event type."""
+    return list(await iter_alerts(state, severity, event))
+
+async def fetch_alerts_page(state: str, limit: int, cursor: str | None = None, severity: str | None = None,
+                            event: str | None = None, fields: list[str] | None = None) -> str:
+    """One page of a state's alerts, most severe first, as compact JSON with the cursor of the next page."""
+    fields = tool_fields(fields, ALERT_FIELDS, DEFAULT_ALERT_FIELDS)
+    features = await iter_alerts(state, severity, event)
+    try:
+        page, next_cursor, total = page_alerts(features, max(limit, 1), cursor)
+    except ValueError as e:
+        raise ToolError(f"{e}; omit the cursor to start from the first page.") from e
+    return to_json({"state": state, "total": total, **compact_alerts(page, fields, COMPACT_TEXT_CHARS),
+                    "next_cursor": next_cursor})
+
+async def fetch_forecast_periods(latitude: float, longitude: float) -> list[dict]:
+    """Fetch the next 5 forecast periods for a location."""
+    # First get the forecast grid endpoint, unless this location's grid is already cached
+    grid = points_cache.get(latitude, longitude)
+    if grid is None:
+        lat, lon = points_cache.round(latitude, longitude)
+        points_url = f"{NWS_API_BASE}/points/{lat},{lon}"
+        try:
+            points_data = await make_nws_request(points_url)
+        except UpstreamError as e:
+            raise ToolError(f"Unable to fetch forecast data for this location: {e}.") from e
+
+        properties = points_data["properties"]
+        grid = {key: properties.get(key) for key in ("forecast", "forecastHourly", "forecastGridData")}
+        points_cache.set(latitude, longitude, grid)
+
+    # Get the forecast URL from the grid info
+    forecast_url = grid["forecast"]
+    try:
+        forecast_data = await make_nws_request(forecast_url)
+    except UpstreamError as e:
+        raise ToolError(f"Unable to fetch detailed forecast: {e}.") from e
+
+    return forecast_data["properties"]["periods"][:5]
+
+async def fetch_forecast(latitude: float, longitude: float) -> str:
+    """Fetch and format the next 5 forecast periods for a location."""
+    periods = await fetch_forecast_periods(latitude, longitude)
+    forecasts = []
+    for period in periods:
+        forecast = f"""
+{period['name']}:
+Temperature: {period['temperature']}°{period['temperatureUnit']}
+Wind: {period['windSpeed']} {period['windDirection']}
+Forecast: {period['detailedForecast']}
+"""
+        forecasts.append(forecast)
+
+    return "\n---\n".join(forecasts)
+
+@instrumented_tool()
+async def get_alerts(state: str, severity: str | None = None, event: str | None = None,
+                     compact: bool = TOOL_OUTPUT_COMPACT, fields: list[str] | None = None) -> str:
     """Get weather alerts for a US state.
 
     Args:
         state: Two-letter US state code (e.g. CA, NY)
+        severity: Only return alerts of this severity (Extreme, Severe, Moderate, Minor)
+        event: Only return alerts of this event type (e.g. Flood Warning)
+        compact: Return short JSON (alert id, chosen fields, truncated texts) instead of full text
+        fields: Fields per alert in compact mode, from event, severity, urgency, headline, areas,
+            onset, expires, description, instruction (default: event, severity, areas, expires, description)
     """
-    url = f"{NWS_API_BASE}/alerts/active/area/{state}"
-    data = await make_nws_request(url)
+    try:
+        if compact:
+            fields = tool_fields(fields, ALERT_FIELDS, DEFAULT_ALERT_FIELDS)
+        features = await fetch_alerts(state, severity, event)
+    except ToolError as e:
+        return tool_failure(str(e))
 
-    if not data or "features" not in data:
-        return "Unable to fetch alerts or no alerts found."
+    if compact:
+        return to_json({"state": state, **compact_alerts(features, fields, COMPACT_TEXT_CHARS)})
 
-    if not data["features"]:
+    if not features:
         return "No active alerts for this state."
 
-    alerts = [format_alert(feature) for feature in data["features"]]
+    alerts = [format_alert(feature) for feature in features]
     return "\n---\n".join(alerts)
 
-@mcp.tool()
-async def get_forecast(latitude: float, longitude: float) -> str:
+@instrumented_tool()
+async def get_forecast(latitude: float, longitude: float,
+                       compact: bool = TOOL_OUTPUT_COMPACT, fields: list[str] | None = None) -> str:
     """Get weather forecast for a location.
 
     Args:
         latitude: Latitude of the location
         longitude: Longitude of the location
+        compact: Return short JSON periods instead of prose
+        fields: Fields per period in compact mode, from name, temperature, wind, precipitation,
+            forecast, detailedForecast (default: name, temperature, wind, forecast)
     """
-    # First get the forecast grid endpoint
-    points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
-    points_data = await make_nws_request(points_url)
+    try:
+        if compact:
+            fields = tool_fields(fields, PERIOD_FIELDS, DEFAULT_PERIOD_FIELDS)
+            return to_json({"periods": compact_periods(await fetch_forecast_periods(latitude, longitude), fields)})
+        return await fetch_forecast(latitude, longitude)
+    except ToolError as e:
+        return tool_failure(str(e))
 
-    if not points_data:
-        return "Unable to fetch forecast data for this location."
+@instrumented_tool()
+async def get_alert_details(alert_id: str) -> str:
+    """Get the full text of one weather alert, e.g. one whose description was truncated in compact mode.
 
-    # Get the forecast URL from the points response
-    forecast_url = points_data["properties"]["forecast"]
-    forecast_data = await make_nws_request(forecast_url)
+    Args:
+        alert_id: The alert's `id` from get_alerts
+    """
+    try:
+        feature = await make_nws_request(f"{NWS_API_BASE}/alerts/{alert_id}")
+    except UpstreamError as e:
+        return tool_failure(f"Unable to fetch this alert: {e}.")
+    if "properties" not in feature:
+        return tool_failure("Unable to fetch this alert.")
+    return format_alert(feature)
 
-    if not forecast_data:
-        return "Unable to fetch detailed forecast."
+@mcp.resource("alerts://{state}")
+async def state_alerts(state: str) -> str:
+    """Active weather alerts for a US state. Subscribe to be notified when they change (needs NWS_ALERT_INDEX)."""
+    return await get_alerts(state)
 
-    # Format the periods into a readable forecast
-    periods = forecast_data["properties"]["periods"]
-    forecasts = []
-    for period in periods[:5]:  # Only show next 5 periods
-        forecast = f"""
-{period['name']}:
-Temperature: {period['temperature']}°{period['temperatureUnit']}
-Wind: {period['windSpeed']} {period['windDirection']}
-Forecast: {period['detailedForecast']}
-"""
-        forecasts.append(forecast)
+@mcp.resource("alerts://{state}/page/{cursor}")
+async def state_alerts_page(state: str, cursor: str) -> str:
+    """A page of a US state's alerts, most severe first. Start at cursor `first`, then follow `next_cursor`."""
+    return await fetch_alerts_page(state, ALERT_PAGE_SIZE, None if cursor == "first" else cursor)
 
-    return "\n---\n".join(forecasts)
+@instrumented_tool()
+async def get_alerts_page(state: str, limit: int = ALERT_PAGE_SIZE, cursor: str | None = None,
+                          severity: str | None = None, event: str | None = None,
+                          fields: list[str] | None = None) -> str:
+    """Get the most severe weather alerts for a US state, one page at a time, as compact JSON.
+
+    Prefer this over get_alerts when a state may have many alerts. Only pass the returned
+    `next_cursor` back as `cursor` if more alerts are needed.
+
+    Args:
+        state: Two-letter US state code (e.g. CA, NY)
+        limit: Alerts per page
+        cursor: `next_cursor` from the previous page; omit for the first page
+        severity: Only return alerts of this severity (Extreme, Severe, Moderate, Minor)
+        event: Only return alerts of this event type (e.g. Flood Warning)
+        fields: Fields per alert, as for get_alerts in compact mode
+    """
+    try:
+        return await fetch_alerts_page(state, limit, cursor, severity, event, fields)
+    except ToolError as e:
+        return tool_failure(str(e))
+
+async def run_batch(items: list, fetch: Callable[[Any], Awaitable[Any]]) -> list[tuple[Any, Any]]:
+    """Run `fetch` for every item, at most BATCH_CONCURRENCY at a time.
+
+    Returns (item, result) pairs in input order; the result is the exception if that item failed.
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(item):
+        async with semaphore:
+            return await fetch(item)
+
+    results = await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
+    return list(zip(items, results))
+
+@instrumented_tool()
+async def get_alerts_many(states: list[str], compact: bool = TOOL_OUTPUT_COMPACT,
+                          fields: list[str] | None = None) -> dict | str:
+    """Get weather alerts for several US states in one call.
+
+    Returns one entry per state with either its alerts or an error, plus a count of failed states.
+
+    Args:
+        states: Two-letter US state codes (e.g. ["CA", "NV", "OR"])
+        compact: Return short JSON alerts, as get_alerts does
+        fields: Fields per alert in compact mode, as for get_alerts
+    """
+    if compact:
+        fields = tool_fields(fields, ALERT_FIELDS, DEFAULT_ALERT_FIELDS)
+    results = []
+    for state, result in await run_batch(states, fetch_alerts):
+        if isinstance(result, Exception):
+            results.append({"state": state, "ok": False, "error": str(result)})
+        elif compact:
+            results.append({"state": state, "ok": True, **compact_alerts(result, fields, COMPACT_TEXT_CHARS)})
+        elif not result:
+            results.append({"state": state, "ok": True, "alerts": "No active alerts for this state."})
+        else:
+            alerts = "\n---\n".join(format_alert(feature) for feature in result)
+            results.append({"state": state, "ok": True, "alerts": alerts})
 
-@mcp.tool()
-def search_external_info(query:str)->list:
+    response = {"results": results, "failed": sum(not r["ok"] for r in results)}
+    if response["failed"]:
+        report_tool_error()
+    return to_json(response) if compact else response
+
+class Location(BaseModel):
+    latitude: float
+    longitude: float
+
+@instrumented_tool()
+async def get_forecast_many(locations: list[Location], compact: bool = TOOL_OUTPUT_COMPACT,
+                            fields: list[str] | None = None) -> dict | str:
+    """Get weather forecasts for several locations (e.g. waypoints along a route) in one call.
+
+    Returns one entry per location with either its forecast or an error, plus a count of failed locations.
+
+    Args:
+        locations: List of {"latitude": ..., "longitude": ...} points
+        compact: Return short JSON periods, as get_forecast does
+        fields: Fields per period in compact mode, as for get_forecast
+    """
+    if compact:
+        fields = tool_fields(fields, PERIOD_FIELDS, DEFAULT_PERIOD_FIELDS)
+    results = []
+    fetch = fetch_forecast_periods if compact else fetch_forecast
+    pairs = await run_batch(locations, lambda loc: fetch(loc.latitude, loc.longitude))
+    for location, result in pairs:
+        entry = {"latitude": location.latitude, "longitude": location.longitude}
+        if isinstance(result, Exception):
+            entry.update(ok=False, error=str(result))
+        elif compact:
+            entry.update(ok=True, periods=compact_periods(result, fields))
+        else:
+            entry.update(ok=True, forecast=result)
+        results.append(entry)
+
+    response = {"results": results, "failed": sum(not r["ok"] for r in results)}
+    if response["failed"]:
+        report_tool_error()
+    return to_json(response) if compact else response
+
+@instrumented_tool()
+async def search_external_info(query:str)->list:
     '''
     Search the internet for the given query and provides the list of search results.
 
     Args:
     query: The search phrase
     '''
-    tavily_client = TavilyClient(api_key=os.getenv('TAVILY_API_KEY'))
-    search_results = tavily_client.search(query,max_results=2)
+    search_results = await get_search_backend().search(query, max_results=2)
     return search_results
 
-@mcp.tool()
-async def nearest_place_finder_agent(prompt:str) -> list:
+@instrumented_tool()
+async def nearest_place_finder_agent(prompt:str, latitude: float = CURRENT_LAT, longitude: float = CURRENT_LNG) -> list:
     '''
     This functions does a Google API map search and returns a list of top 5 queried places alongwith ratings
-    and lat-long details.
-    '''
-    print('Fetching the list of nearest places!....')
-    #st.pauls lat & lng
-    curr_lat = 51.513446
-    curr_lng = -0.099869
-    headers = {
-    "Content-Type": "application/json",
-    "X-Goog-FieldMask": "places.displayName,places.location,places.id,places.formattedAddress,places.currentOpeningHours,places.priceLevel,places.rating",
-    "X-Goog-Api-Key": <'YOUR_GOOGLE_API_KEY'>
-    }
-
-    data = {
-    "textQuery" : f"{prompt}",
-    "rankPreference": "DISTANCE",
-    "maxResultCount": 5,
-    "locationBias": {
-    "circle": {
-      "center": {
-        "latitude": curr_lat,
-        "longitude": curr_lng
-        },
-      "radius": 2000
-        }
-    }
-    #"priceLevels":["PRICE_LEVEL_INEXPENSIVE","PRICE_LEVEL_MODERATE"]
-    }
+    and lat-long details, nearest first.
 
-    response = requests.post(url="https://places.googleapis.com/v1/places:searchText",json=data,headers=headers)
-    res = response.json()
+    Args:
+    prompt: What to look for, e.g. "coffee shop"
+    latitude: Latitude to search around (defaults to the current location)
+    longitude: Longitude to search around (defaults to the current location)
+    '''
+    places = await get_places_client().search_text(
+        prompt, preset="nearest_place", latitude=latitude, longitude=longitude, radius=2000, max_results=5
+    )
     list_of_elements = []
-    for elements in res['places']:
+    for elements in places:
         dict_={"name":elements.get('displayName',{}).get('text'),
         "user_rating":elements.get('rating'),
         "latitude":elements.get('location',{}).get('latitude', ''),
@@ -155,49 +676,92 @@ async def nearest_place_finder_agent(prompt:str) -> list:
    
     return list_of_elements
 
-@mcp.tool()
-def navigation_agent(prompt:str) -> dict:
+@instrumented_tool()
+async def navigation_agent(prompt:str, latitude: float = CURRENT_LAT, longitude: float = CURRENT_LNG) -> dict:
     '''
-    Searches for the queried destination from the current location and opens the gmap navigation tool
-    '''
-    
-    print('Opening the navigation tool for you!...')
+    Searches for the queried destination from the origin and opens the gmap navigation tool
 
-    #st.paul's lat & lng
-    curr_lat = 51.513446
-    curr_lng = -0.099869
-    headers = {
-    "Content-Type": "application/json",
-    "X-Goog-FieldMask": "places.displayName,places.id,places.formattedAddress,places.googleMapsLinks,places.location",
-    "X-Goog-Api-Key": <'YOUR_GOOGLE_API_KEY'>
-    }
-
-    data = {
-        "textQuery" : prompt,
-        "rankPreference": "DISTANCE",
-        "maxResultCount": 1,
-        "locationBias": {
-        "circle": {
-        "center": {
-            "latitude": curr_lat,
-            "longitude": curr_lng
-            },
-        #"radius": 2000
-            }
-        }
-    }
+    Args:
+    prompt: The destination to navigate to
+    latitude: Latitude of the origin (defaults to the current location)
+    longitude: Longitude of the origin (defaults to the current location)
+    '''
 
-    response = requests.post(url="https://places.googleapis.com/v1/places:searchText",json=data,headers=headers)
-    pprint(response.json())
-    dest_lat = response.json()['places'][0]['location']['latitude']
-    dest_lng = response.json()['places'][0]['location']['longitude']
+    places = await get_places_client().search_text(
+        prompt, preset="navigation", latitude=latitude, longitude=longitude, max_results=1
+    )
+    if not places:
+        return {'url':None,'text':'I could not find that destination'}
+    dest_lat = places[0]['location']['latitude']
+    dest_lng = places[0]['location']['longitude']
 
-    google_navigation_url = f"https://www.google.com/maps/dir/?api=1&origin={curr_lat},{curr_lng}&destination={dest_lat},{dest_lng}&travelmode=driving&key=<'YOUR_GOOGLE_API_KEY'>"
+    google_navigation_url = f"https://www.google.com/maps/dir/?api=1&origin={latitude},{longitude}&destination={dest_lat},{dest_lng}&travelmode=driving&key=<'YOUR_GOOGLE_API_KEY'>"
     
     # webbrowser.open_new(google_navigation_url)
 
     return {'url':google_navigation_url,'text':'I am now opening the navigation tool for you'}
 
+def create_app():
+    """ASGI app for the network transports, selected by the MCP_TRANSPORT environment variable.
+
+    Used as a uvicorn app factory so each worker process builds its own app. The shared HTTP
+    client, caches and alert poller live for the whole app rather than for one client session.
+    """
+    transport = os.getenv('MCP_TRANSPORT', 'sse')
+    if transport == 'streamable-http':
+        app = mcp.streamable_http_app()
+    else:
+        app = mcp.sse_app()
+
+    session_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def app_lifespan(app):
+        async with shared_resources():
+            async with session_lifespan(app):
+                yield
+
+    app.router.lifespan_context = app_lifespan
+    return app
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Weather, search and places MCP server")
+    parser.add_argument("--transport", choices=["stdio", "sse", "streamable-http"],
+                        default=os.getenv('MCP_TRANSPORT', 'stdio'),
+                        help="stdio for a per-client subprocess, or a network transport shared by many clients")
+    parser.add_argument("--host", default=mcp.settings.host)
+    parser.add_argument("--port", type=int, default=mcp.settings.port)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes behind the port (streamable-http only)")
+    args = parser.parse_args()
+
+    if args.transport == 'stdio':
+        mcp.run(transport='stdio')
+        return
+
+    if args.transport == 'streamable-http' and not hasattr(mcp, 'streamable_http_app'):
+        parser.error("streamable-http needs mcp>=1.8; upgrade the mcp package or use --transport sse")
+    if args.workers > 1:
+        # SSE sessions live in the worker that holds the stream, and requests are spread across
+        # workers, so only stateless streamable HTTP can be served by several processes
+        if args.transport != 'streamable-http' or not hasattr(mcp.settings, 'stateless_http'):
+            parser.error("--workers > 1 needs --transport streamable-http with mcp>=1.9 (stateless mode)")
+        os.environ['FASTMCP_STATELESS_HTTP'] = 'true'
+
+    import uvicorn
+    os.environ['MCP_TRANSPORT'] = args.transport
+    uvicorn.run(
+        "mcp_server:create_app",
+        factory=True,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=mcp.settings.log_level.lower(),
+        # SSE streams of clients that went away don't always end, which would block shutdown
+        timeout_graceful_shutdown=5,
+    )
+
 if __name__ == "__main__":
-    # Initialize and run the server
-    mcp.run(transport='stdio')
+    main()
@@ -0,0 +1,269 @@
+import asyncio
+import functools
+import json
+import sys
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+from tracing import current_trace
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Set by `report_tool_error` during an instrumented tool call
+_tool_error: ContextVar[bool] = ContextVar("tool_error", default=False)
+
+
+def report_tool_error() -> None:
+    """Count the tool call in progress as an error, for tools that return their failures as text."""
+    _tool_error.set(True)
+
+
+def result_size(result: Any) -> int:
+    """Size in bytes of a tool result: UTF-8 for text, JSON for anything else."""
+    if isinstance(result, str):
+        return len(result.encode())
+    return len(json.dumps(result, default=str).encode())
+
+
+class LatencyStats:
+    """Latency histogram plus error, timeout and payload-size counters for one tool or upstream."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.timeouts = 0
+        self.bytes = 0
+
+    def observe(self, seconds: float, error: bool = False, timeout: bool = False, size: int = 0) -> None:
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.errors += error
+        self.timeouts += timeout
+        self.bytes += size
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (the largest bound for the overflow bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + (float("inf"),), self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound if bound != float("inf") else BUCKETS[-1]
+        return BUCKETS[-1]
+
+    def snapshot(self) -> dict[str, Any]:
+        p50, p99 = self.quantile(0.5), self.quantile(0.99)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "bytes": self.bytes,
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else None,
+            "p50_ms_le": p50 * 1000 if p50 is not None else None,
+            "p99_ms_le": p99 * 1000 if p99 is not None else None,
+        }
+
+
+class Metrics:
+    """Per-tool and per-upstream latency stats, cache counters and recent per-trace spans.
+
+    Spans are kept for the last `max_traces` trace IDs (LRU) so a client can look up where
+    the time of one of its requests went.
+    """
+
+    def __init__(self, max_traces: int = 256):
+        self.max_traces = max_traces
+        self.tools: dict[str, LatencyStats] = {}
+        self.upstreams: dict[str, LatencyStats] = {}
+        self.caches: dict[str, dict] = {}
+        self._traces: OrderedDict[str, list[dict]] = OrderedDict()
+
+    def register_cache(self, name: str, stats: dict) -> None:
+        """Report a cache's live `stats` counters (e.g. {"hits": .., "misses": ..})."""
+        self.caches[name] = stats
+
+    def observe(self, kind: str, name: str, seconds: float, error: bool = False, timeout: bool = False,
+                size: int = 0, trace_id: Optional[str] = None) -> None:
+        group = self.tools if kind == "tool" else self.upstreams
+        group.setdefault(name, LatencyStats()).observe(seconds, error, timeout, size)
+        trace_id = trace_id or current_trace.get()
+        if trace_id is not None:
+            spans = self._traces.setdefault(trace_id, [])
+            self._traces.move_to_end(trace_id)
+            spans.append({"kind": kind, "name": name, "ms": round(seconds * 1000, 2),
+                          "error": error, "timeout": timeout, "bytes": size})
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+
+    def instrument_tool(self, fn: Callable[..., Awaitable[Any]],
+                        get_trace_id: Callable[[], Optional[str]] = lambda: None) -> Callable[..., Awaitable[Any]]:
+        """Wrap an async tool function to time it under the trace ID returned by `get_trace_id`.
+
+        A call counts as an error if it raises or calls `report_tool_error`.
+        """
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            token = current_trace.set(get_trace_id())
+            error_token = _tool_error.set(False)
+            start = time.perf_counter()
+            error = False
+            size = 0
+            try:
+                result = await fn(*args, **kwargs)
+                error = _tool_error.get()
+                size = result_size(result)
+                return result
+            except BaseException:
+                error = True
+                raise
+            finally:
+                self.observe("tool", fn.__name__, time.perf_counter() - start, error=error, size=size)
+                _tool_error.reset(error_token)
+                current_trace.reset(token)
+        return wrapper
+
+    def trace(self, trace_id: str) -> dict[str, Any]:
+        spans = self._traces.get(trace_id, [])
+        return {
+            "trace_id": trace_id,
+            "spans": spans,
+            "tool_ms": round(sum(s["ms"] for s in spans if s["kind"] == "tool"), 2),
+            "upstream_ms": round(sum(s["ms"] for s in spans if s["kind"] == "upstream"), 2),
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        caches = {}
+        for name, stats in self.caches.items():
+            hits, misses = stats.get("hits", 0), stats.get("misses", 0)
+            caches[name] = {**stats, "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None}
+        return {
+            "tools": {name: stats.snapshot() for name, stats in self.tools.items()},
+            "upstreams": {name: stats.snapshot() for name, stats in self.upstreams.items()},
+            "caches": caches,
+        }
+
+    def prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for kind, group, label in (("tool", self.tools, "tool"), ("upstream", self.upstreams, "upstream")):
+            metric = f"mcp_{kind}_duration_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for name, stats in group.items():
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float("inf"),), stats.buckets):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{metric}_bucket{{{label}="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{label}="{name}"}} {stats.total}')
+                lines.append(f'{metric}_count{{{label}="{name}"}} {stats.count}')
+            for counter in ("errors", "timeouts", "bytes"):
+                lines.append(f"# TYPE mcp_{kind}_{counter}_total counter")
+                for name, stats in group.items():
+                    lines.append(f'mcp_{kind}_{counter}_total{{{label}="{name}"}} {getattr(stats, counter)}')
+        lines.append("# TYPE mcp_cache_events_total counter")
+        for name, stats in self.caches.items():
+            for event, value in stats.items():
+                lines.append(f'mcp_cache_events_total{{cache="{name}",event="{event}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, port: int, host: str = "127.0.0.1") -> Optional[asyncio.AbstractServer]:
+        """Serve GET /metrics (Prometheus text) and /metrics.json on a local port.
+
+        Returns None if the port is taken (e.g. by another worker process).
+        """
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            try:
+                request_line = (await reader.readline()).decode()
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                path = request_line.split(" ")[1] if request_line.count(" ") >= 2 else ""
+                if path == "/metrics":
+                    status, content_type, body = "200 OK", "text/plain; version=0.0.4", self.prometheus()
+                elif path == "/metrics.json":
+                    status, content_type, body = "200 OK", "application/json", json.dumps(self.snapshot())
+                else:
+                    status, content_type, body = "404 Not Found", "text/plain", "not found\n"
+                data = body.encode()
+                writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                             f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data)
+                await writer.drain()
+            finally:
+                writer.close()
+
+        try:
+            return await asyncio.start_server(handle, host, port)
+        except OSError as e:
+            print(f"Metrics endpoint not started on {host}:{port}: {e}", file=sys.stderr)
+            return None
+
+
+class _MeasuredStream(httpx.AsyncByteStream):
+    """Response body stream that reports the call once the body has been read and closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[int], None]):
+        self._stream = stream
+        self._on_close = on_close
+        self._size = 0
+        self._closed = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._size += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+        if not self._closed:
+            self._closed = True
+            self._on_close(self._size)
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """httpx transport wrapper that records every upstream request in `metrics`.
+
+    `classify` maps a request URL to the upstream name it is reported under. The time
+    covers the request until the response body has been read.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, metrics: Metrics, classify: Callable[[httpx.URL], str]):
+        self.transport = transport
+        self.metrics = metrics
+        self.classify = classify
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        name = self.classify(request.url)
+        trace_id = current_trace.get()
+        start = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except httpx.TimeoutException:
+            self.metrics.observe("upstream", name, time.perf_counter() - start, error=True, timeout=True, trace_id=trace_id)
+            raise
+        except Exception:
+            self.metrics.observe("upstream", name, time.perf_counter() - start, error=True, trace_id=trace_id)
+            raise
+
+        def on_close(size: int) -> None:
+            self.metrics.observe("upstream", name, time.perf_counter() - start,
+                                 error=response.status_code >= 400, size=size, trace_id=trace_id)
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_MeasuredStream(response.stream, on_close),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
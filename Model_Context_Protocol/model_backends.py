@@ -0,0 +1,147 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Optional, Protocol
+
+
+class ModelBackend(Protocol):
+    """Anything that can stream Bedrock Converse events.
+
+    `converse_stream` takes the same keyword arguments as the Bedrock `converse_stream` API
+    and yields its stream events (`messageStart`, `contentBlockStart`, `contentBlockDelta`,
+    `contentBlockStop`, `messageStop`, `metadata`) as plain dicts.
+    """
+
+    def converse_stream(self, **kwargs: Any) -> AsyncIterator[dict]: ...
+
+
+_DONE = object()
+
+
+class BedrockStreamer:
+    """Streams responses from the Bedrock Converse streaming API without blocking the event loop.
+
+    boto3 is synchronous, so the request and the event stream are consumed in a worker
+    thread and handed to the loop as they arrive.
+    """
+
+    def __init__(self, bedrock_client):
+        self.bedrock_client = bedrock_client
+
+    async def converse_stream(self, **kwargs: Any) -> AsyncIterator[dict]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def produce():
+            try:
+                response = self.bedrock_client.converse_stream(**kwargs)
+                for event in response['stream']:
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+
+        producer = loop.run_in_executor(None, produce)
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await producer
+
+
+@dataclass
+class TurnResult:
+    """One assembled model turn, shaped like the output of the non-streaming `converse` call."""
+    message: dict
+    stop_reason: Optional[str]
+    time_to_first_token: Optional[float]
+    total_latency: float
+    usage: dict = field(default_factory=dict)
+
+
+async def stream_turn(backend: ModelBackend, on_text: Optional[Callable[[str], None]] = None,
+                      **kwargs: Any) -> TurnResult:
+    """Run one model turn, calling `on_text` with each text delta as it arrives.
+
+    Text and toolUse blocks are reassembled into a complete assistant message, and the
+    time to the first token and total latency of the turn are measured.
+    """
+    start = time.perf_counter()
+    first_token_at = None
+    blocks: dict[int, dict] = {}
+    tool_inputs: dict[int, list[str]] = {}
+    stop_reason = None
+    usage: dict = {}
+
+    async for event in backend.converse_stream(**kwargs):
+        if 'contentBlockStart' in event:
+            index = event['contentBlockStart']['contentBlockIndex']
+            tool_use = event['contentBlockStart']['start'].get('toolUse')
+            if tool_use:
+                blocks[index] = {'toolUse': {'toolUseId': tool_use['toolUseId'], 'name': tool_use['name']}}
+                tool_inputs[index] = []
+        elif 'contentBlockDelta' in event:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            index = event['contentBlockDelta']['contentBlockIndex']
+            delta = event['contentBlockDelta']['delta']
+            if 'text' in delta:
+                blocks.setdefault(index, {'text': ''})['text'] += delta['text']
+                if on_text:
+                    on_text(delta['text'])
+            elif 'toolUse' in delta:
+                tool_inputs.setdefault(index, []).append(delta['toolUse']['input'])
+        elif 'messageStop' in event:
+            stop_reason = event['messageStop']['stopReason']
+        elif 'metadata' in event:
+            usage = event['metadata'].get('usage', {})
+
+    for index, parts in tool_inputs.items():
+        raw_input = "".join(parts)
+        blocks[index]['toolUse']['input'] = json.loads(raw_input) if raw_input else {}
+
+    total = time.perf_counter() - start
+    message = {'role': 'assistant', 'content': [blocks[index] for index in sorted(blocks)]}
+    ttft = first_token_at - start if first_token_at is not None else None
+    return TurnResult(message, stop_reason, ttft, total, usage)
+
+
+class ScriptedStreamer:
+    """Offline stand-in backend that replays scripted assistant messages as Converse stream events.
+
+    Each call streams the next message in `turns` (the last one repeats once the script runs out),
+    splitting text into word deltas `token_delay` seconds apart. Useful for tests and benchmarks.
+    """
+
+    def __init__(self, turns: list[dict], token_delay: float = 0.0):
+        self.turns = turns
+        self.token_delay = token_delay
+        self.calls = 0
+
+    async def converse_stream(self, **kwargs: Any) -> AsyncIterator[dict]:
+        message = self.turns[min(self.calls, len(self.turns) - 1)]
+        self.calls += 1
+        yield {'messageStart': {'role': 'assistant'}}
+        stop_reason = 'end_turn'
+        for index, block in enumerate(message['content']):
+            if 'text' in block:
+                yield {'contentBlockStart': {'contentBlockIndex': index, 'start': {}}}
+                for position, word in enumerate(block['text'].split(' ')):
+                    await asyncio.sleep(self.token_delay)
+                    text = word if position == 0 else ' ' + word
+                    yield {'contentBlockDelta': {'contentBlockIndex': index, 'delta': {'text': text}}}
+            else:
+                tool_use = block['toolUse']
+                stop_reason = 'tool_use'
+                yield {'contentBlockStart': {'contentBlockIndex': index, 'start': {
+                    'toolUse': {'toolUseId': tool_use['toolUseId'], 'name': tool_use['name']}}}}
+                await asyncio.sleep(self.token_delay)
+                yield {'contentBlockDelta': {'contentBlockIndex': index, 'delta': {
+                    'toolUse': {'input': json.dumps(tool_use['input'])}}}}
+            yield {'contentBlockStop': {'contentBlockIndex': index}}
+        yield {'messageStop': {'stopReason': stop_reason}}
@@ -0,0 +1,110 @@
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from search_backend import normalize_query
+
+try:
+    import numpy as np
+except ImportError:  # numpy comes with the LangChain dependencies; fall back to a plain loop without it
+    np = None
+
+EARTH_RADIUS_M = 6_371_000
+
+
+def haversine_m(latitude: float, longitude: float, latitudes, longitudes) -> list[float]:
+    """Great-circle distances in metres from one point to many, vectorized with numpy when available."""
+    if np is None:
+        return [_haversine_one(latitude, longitude, lat, lon) for lat, lon in zip(latitudes, longitudes)]
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(np.asarray(latitudes, dtype=float)), np.radians(np.asarray(longitudes, dtype=float))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return (2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))).tolist()
+
+
+def _haversine_one(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+@dataclass
+class _Entry:
+    latitude: float
+    longitude: float
+    places: list[dict[str, Any]]
+    expires_at: float
+
+
+class PlacesCache:
+    """Spatial cache of Places text-search results.
+
+    Results are indexed by grid cell (`cell_degrees` wide) of the search origin, plus the
+    normalized query text and search options. A later search for the same query whose origin
+    is within `max_shift_m` metres of a cached one (in its own or a neighbouring cell) is
+    answered from that entry, with the places re-ranked by distance from the new origin.
+    Entries expire after `ttl` seconds; at most `max_entries` are kept (LRU).
+
+    `stats` counts hits and misses.
+    """
+
+    def __init__(self, cell_degrees: float = 0.01, max_shift_m: float = 250, ttl: float = 3600,
+                 max_entries: int = 1024):
+        self.cell_degrees = cell_degrees
+        self.max_shift_m = max_shift_m
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+
+    def cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def get(self, query: str, options: tuple, latitude: float, longitude: float) -> list[dict[str, Any]] | None:
+        """Cached places for a search from this origin, nearest first, or None on a miss."""
+        now = time.time()
+        row, col = self.cell(latitude, longitude)
+        text = normalize_query(query)
+        candidates = []
+        for key in ((text, options, (row + dr, col + dc)) for dr in (-1, 0, 1) for dc in (-1, 0, 1)):
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            if entry.expires_at <= now:
+                del self._entries[key]
+                continue
+            candidates.append((key, entry))
+
+        if candidates:
+            shifts = haversine_m(latitude, longitude, [e.latitude for _, e in candidates], [e.longitude for _, e in candidates])
+            shift, key, entry = min(zip(shifts, (k for k, _ in candidates), (e for _, e in candidates)), key=lambda c: c[0])
+            if shift <= self.max_shift_m:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return self.rank(entry.places, latitude, longitude)
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, query: str, options: tuple, latitude: float, longitude: float, places: list[dict[str, Any]]) -> None:
+        key = (normalize_query(query), options, self.cell(latitude, longitude))
+        self._entries[key] = _Entry(latitude, longitude, places, time.time() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def rank(places: list[dict[str, Any]], latitude: float, longitude: float) -> list[dict[str, Any]]:
+        """`places` sorted by distance from the origin; places without a location go last."""
+        located = [place for place in places if place.get("location")]
+        if not located:
+            return places
+        distances = haversine_m(
+            latitude, longitude,
+            [place["location"]["latitude"] for place in located],
+            [place["location"]["longitude"] for place in located],
+        )
+        order = sorted(range(len(located)), key=distances.__getitem__)
+        return [located[i] for i in order] + [place for place in places if not place.get("location")]
@@ -0,0 +1,78 @@
+from typing import Any, Callable
+
+import httpx
+
+from places_cache import PlacesCache
+from singleflight import SingleFlight, request_key
+
+PLACES_API_BASE = "https://places.googleapis.com/v1"
+
+# Response field masks per tool. Places bills and sizes responses by the fields requested,
+# so each tool only asks for what it actually reads.
+FIELD_MASKS = {
+    "nearest_place": "places.displayName,places.location,places.id,places.formattedAddress,places.currentOpeningHours,places.priceLevel,places.rating",
+    "navigation": "places.displayName,places.id,places.formattedAddress,places.googleMapsLinks,places.location",
+}
+
+
+class PlacesClient:
+    """Async client for the Google Places `searchText` API.
+
+    Requests go through the HTTP client returned by `get_client`, so they share its
+    connection pool, and identical concurrent searches are coalesced via `flight`. With a
+    `cache`, repeat searches from nearby origins are answered locally.
+    """
+
+    def __init__(self, api_key: str | None, get_client: Callable[[], httpx.AsyncClient],
+                 base_url: str = PLACES_API_BASE, flight: SingleFlight | None = None,
+                 cache: PlacesCache | None = None):
+        self.api_key = api_key
+        self.get_client = get_client
+        self.base_url = base_url
+        self.flight = flight or SingleFlight()
+        self.cache = cache
+
+    async def search_text(self, query: str, preset: str, latitude: float, longitude: float,
+                          radius: float | None = None, max_results: int = 5) -> list[dict[str, Any]]:
+        """Search for places matching `query` near a location, closest first.
+
+        Args:
+            query: Free-text search, e.g. "coffee shop"
+            preset: Key into FIELD_MASKS selecting which fields to return
+            latitude: Latitude to bias the search around
+            longitude: Longitude to bias the search around
+            radius: Bias circle radius in metres (optional)
+            max_results: Maximum number of places to return
+        """
+        options = (preset, radius, max_results)
+        if self.cache is not None:
+            cached = self.cache.get(query, options, latitude, longitude)
+            if cached is not None:
+                return cached
+
+        circle: dict[str, Any] = {"center": {"latitude": latitude, "longitude": longitude}}
+        if radius is not None:
+            circle["radius"] = radius
+        data = {
+            "textQuery": query,
+            "rankPreference": "DISTANCE",
+            "maxResultCount": max_results,
+            "locationBias": {"circle": circle},
+        }
+        headers = {
+            "Content-Type": "application/json",
+            "X-Goog-FieldMask": FIELD_MASKS[preset],
+            "X-Goog-Api-Key": self.api_key or "",
+        }
+        url = f"{self.base_url}/places:searchText"
+
+        async def fetch() -> list[dict[str, Any]]:
+            response = await self.get_client().post(url, json=data, headers=headers)
+            response.raise_for_status()
+            # Places omits the key entirely when nothing matches
+            places = response.json().get("places", [])
+            if self.cache is not None:
+                self.cache.set(query, options, latitude, longitude, places)
+            return places
+
+        return await self.flight.do(request_key("POST", url, body=[headers["X-Goog-FieldMask"], data]), fetch)
@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class PointsCache:
+    """LRU + TTL cache for NWS `/points/{lat},{lon}` lookups.
+
+    The grid a coordinate maps to (and so its forecast URLs) practically never changes,
+    so caching it turns `get_forecast` into a single upstream call on repeat locations.
+    Coordinates are rounded to `precision` decimals before being used as the key.
+    If `db_path` is given, entries are also written to a SQLite file so they survive restarts.
+    `stats` counts hits and misses.
+    """
+
+    def __init__(self, precision: int = 4, ttl: float = 7 * 24 * 3600,
+                 max_entries: int = 1024, db_path: str | None = None):
+        self.precision = precision
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+        self._db = None
+        if db_path:
+            # Imported only when persistence is enabled, to keep server startup lean
+            import sqlite3
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS points "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM points WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+    def round(self, latitude: float, longitude: float) -> tuple[str, str]:
+        """Round a coordinate pair to the configured precision."""
+        return f"{latitude:.{self.precision}f}", f"{longitude:.{self.precision}f}"
+
+    def key(self, latitude: float, longitude: float) -> str:
+        return ",".join(self.round(latitude, longitude))
+
+    def get(self, latitude: float, longitude: float) -> dict[str, Any] | None:
+        """Return the cached grid info for a location, or None on a miss or expiry."""
+        key = self.key(latitude, longitude)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is None:
+                self.stats["misses"] += 1
+                return None
+            row = self._db.execute(
+                "SELECT value, expires_at FROM points WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self.stats["misses"] += 1
+                return None
+            value = json.loads(row[0])
+            self._store(key, row[1], value)
+            self.stats["hits"] += 1
+            return value
+
+    def set(self, latitude: float, longitude: float, value: dict[str, Any]) -> None:
+        """Cache the grid info for a location."""
+        key = self.key(latitude, longitude)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, expires_at, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO points (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at),
+                )
+                self._db.commit()
+
+    def _store(self, key: str, expires_at: float, value: dict[str, Any]) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
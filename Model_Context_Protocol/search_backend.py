@@ -0,0 +1,69 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+import httpx
+
+from singleflight import SingleFlight
+
+TAVILY_API_BASE = "https://api.tavily.com"
+
+
+def normalize_query(query: str) -> str:
+    """Fold case and collapse whitespace so near-identical queries share a cache entry."""
+    return " ".join(query.casefold().split())
+
+
+class SearchBackend:
+    """Async Tavily web search with a result cache and a concurrency limit.
+
+    Results are cached by normalized query text for `ttl` seconds, keeping at most
+    `max_entries` (least recently used are evicted first). At most `max_concurrency`
+    searches hit the Tavily API at once; identical concurrent searches share one request.
+    `stats` counts cache hits and misses.
+    """
+
+    def __init__(self, api_key: str | None, get_client: Callable[[], httpx.AsyncClient],
+                 base_url: str = TAVILY_API_BASE, ttl: float = 3600, max_entries: int = 512,
+                 max_concurrency: int = 4, flight: SingleFlight | None = None):
+        self.api_key = api_key
+        self.get_client = get_client
+        self.base_url = base_url
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.flight = flight or SingleFlight()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._cache: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    async def search(self, query: str, max_results: int = 2) -> dict[str, Any]:
+        """Search the web for `query`, returning Tavily's response (with a `results` list)."""
+        key = f"{max_results}:{normalize_query(query)}"
+        entry = self._cache.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > time.time():
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return result
+            del self._cache[key]
+
+        self.stats["misses"] += 1
+        return await self.flight.do(f"tavily:search {key}", lambda: self._fetch(key, query, max_results))
+
+    async def _fetch(self, key: str, query: str, max_results: int) -> dict[str, Any]:
+        async with self._semaphore:
+            response = await self.get_client().post(
+                f"{self.base_url}/search",
+                json={"query": query, "max_results": max_results},
+                headers={"Authorization": f"Bearer {self.api_key}"},
+            )
+        response.raise_for_status()
+        result = response.json()
+
+        self._cache[key] = (time.time() + self.ttl, result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return result
@@ -0,0 +1,257 @@
+import asyncio
+import json
+import os
+from typing import Any, Optional
+
+import anyio
+from mcp import ClientSession, StdioServerParameters, types
+from mcp.client.stdio import get_default_environment, stdio_client
+
+from tool_registry import ToolRegistry
+from tracing import call_tool_traced, read_trace
+
+# Errors raised by a session whose server process has gone away
+CONNECTION_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, ConnectionError)
+
+
+class _ReadStreamWatcher:
+    """A session's read stream that sets `ended` once the server's output closes.
+
+    mcp leaves requests that are in flight when the server process dies waiting forever;
+    `ended` lets callers notice and fail them instead.
+    """
+
+    def __init__(self, stream, ended: asyncio.Event):
+        self._stream = stream
+        self._ended = ended
+
+    async def receive(self):
+        try:
+            return await self._stream.receive()
+        except (anyio.EndOfStream, anyio.ClosedResourceError, anyio.BrokenResourceError):
+            self._ended.set()
+            raise
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.receive()
+        except anyio.EndOfStream:
+            raise StopAsyncIteration
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+
+class ServerConnection:
+    """One stdio MCP server process and its session, respawned on demand if it dies.
+
+    A tool call in flight when the process dies fails with ConnectionError as soon as its
+    output closes, and is retried once on a respawned server.
+
+    The transport and session contexts live in a dedicated task for the lifetime of the
+    connection, so they are entered and exited in the same task even when connections are
+    opened concurrently.
+    """
+
+    def __init__(self, name: str, params: StdioServerParameters, tools: Optional[list[str]] = None,
+                 startup_timeout: float = 30):
+        self.name = name
+        self.params = params
+        self.startup_timeout = startup_timeout
+        # Tool allowlist: only these tools of the server are exposed (all when None)
+        self.allowed_tools = set(tools) if tools is not None else None
+        self.session: Optional[ClientSession] = None
+        self.tool_registry = ToolRegistry()
+        # Set when the current server's output closes, i.e. the process died
+        self._lost = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._lock = asyncio.Lock()
+
+    async def connect(self) -> None:
+        async with self._lock:
+            if self.session is None:
+                await self._start()
+
+    async def reconnect(self, dead_session: Optional[ClientSession]) -> None:
+        """Respawn the server unless another caller already replaced `dead_session`."""
+        async with self._lock:
+            if self.session is not None and self.session is not dead_session:
+                return
+            print(f"\nMCP server '{self.name}' is not responding, restarting it...")
+            await self._shutdown()
+            await self._start()
+
+    async def call_tool(self, name: str, arguments: dict[str, Any],
+                        trace_id: Optional[str] = None) -> types.CallToolResult:
+        session = self.session
+        if session is None:
+            await self.reconnect(None)
+            session = self.session
+        try:
+            return await self._call_tool(session, name, arguments, trace_id)
+        except CONNECTION_ERRORS:
+            await self.reconnect(session)
+            return await self._call_tool(self.session, name, arguments, trace_id)
+
+    async def _call_tool(self, session: ClientSession, name: str, arguments: dict[str, Any],
+                         trace_id: Optional[str]) -> types.CallToolResult:
+        """Call a tool, failing with ConnectionError if the server dies before it answers."""
+        lost = self._lost
+        if lost.is_set():
+            raise ConnectionError(f"MCP server '{self.name}' exited")
+        call = asyncio.ensure_future(call_tool_traced(session, name, arguments, trace_id))
+        watch = asyncio.ensure_future(lost.wait())
+        try:
+            done, _ = await asyncio.wait({call, watch}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            watch.cancel()
+            if not call.done():
+                call.cancel()
+        if call not in done:
+            raise ConnectionError(f"MCP server '{self.name}' exited during the call to {name}")
+        return call.result()
+
+    async def tools(self) -> list[types.Tool]:
+        tools = await self.tool_registry.tools()
+        if self.allowed_tools is None:
+            return tools
+        return [tool for tool in tools if tool.name in self.allowed_tools]
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._shutdown()
+
+    async def _start(self) -> None:
+        ready = asyncio.get_running_loop().create_future()
+        self._stop = asyncio.Event()
+        self._lost = asyncio.Event()
+        self._task = asyncio.create_task(self._run(ready, self._stop, self._lost))
+        await ready
+
+    async def _shutdown(self) -> None:
+        if self._task is not None:
+            self._stop.set()
+            await self._task
+            self._task = None
+        self.session = None
+
+    async def _run(self, ready: asyncio.Future, stop: asyncio.Event, lost: asyncio.Event) -> None:
+        try:
+            async with stdio_client(self.params) as (read, write):
+                read = _ReadStreamWatcher(read, lost)
+                async with ClientSession(read, write, message_handler=self.tool_registry.handle_message) as session:
+                    # A server that crashes on startup never answers initialize
+                    with anyio.fail_after(self.startup_timeout):
+                        await session.initialize()
+                    self.session = session
+                    self.tool_registry.session = session
+                    # A respawned server may expose different tools
+                    self.tool_registry.invalidate()
+                    ready.set_result(None)
+                    await stop.wait()
+        except Exception as e:
+            # A dead server surfaces here as an ExceptionGroup from the transport on exit
+            if not ready.done():
+                ready.set_exception(ConnectionError(f"Failed to start MCP server '{self.name}': {e}"))
+        finally:
+            if not ready.done():
+                ready.set_exception(ConnectionError(f"MCP server '{self.name}' exited during startup"))
+
+
+class SessionManager:
+    """Connects to several MCP servers and presents their tools as one catalog.
+
+    Tools are namespaced as `<server><separator><tool>` and every `call_tool` is routed to
+    the session that owns the tool. A server whose process has died is respawned and
+    re-initialized transparently on the next call.
+    """
+
+    def __init__(self, connections: list[ServerConnection], separator: str = "__"):
+        self.connections = {connection.name: connection for connection in connections}
+        self.separator = separator
+
+    @classmethod
+    def from_config(cls, path: str) -> "SessionManager":
+        """Load servers from a JSON file: {"mcpServers": {name: {command, args, env, cwd, tools, startup_timeout}}}."""
+        with open(path) as f:
+            config = json.load(f)
+        base_dir = os.path.dirname(os.path.abspath(path))
+        connections = []
+        for name, server in config["mcpServers"].items():
+            env = {**get_default_environment(), **server["env"]} if server.get("env") else None
+            params = StdioServerParameters(
+                command=server["command"],
+                args=server.get("args", []),
+                env=env,
+                cwd=os.path.join(base_dir, server.get("cwd", ".")),
+            )
+            connections.append(ServerConnection(name, params, server.get("tools"), server.get("startup_timeout", 30)))
+        return cls(connections)
+
+    async def connect_all(self) -> None:
+        """Start every server concurrently; servers that fail to start are reported and skipped."""
+        results = await asyncio.gather(
+            *(connection.connect() for connection in self.connections.values()), return_exceptions=True
+        )
+        for name, result in zip(list(self.connections), results):
+            if isinstance(result, BaseException):
+                print(f"\n{result}")
+                del self.connections[name]
+        if not self.connections:
+            raise ConnectionError("Could not connect to any MCP server")
+
+    async def list_tools(self) -> list[types.Tool]:
+        """All servers' tools with namespaced names."""
+        per_server = await asyncio.gather(*(connection.tools() for connection in self.connections.values()))
+        return [
+            tool.model_copy(update={"name": f"{name}{self.separator}{tool.name}"})
+            for name, tools in zip(self.connections, per_server)
+            for tool in tools
+        ]
+
+    async def bedrock_specs(self) -> list[dict]:
+        return [{"toolSpec":
+            {
+            "name": tool.name,
+            "description": tool.description,
+            "inputSchema": {"json":tool.inputSchema}
+            }
+        } for tool in await self.list_tools()]
+
+    async def call_tool(self, name: str, arguments: dict[str, Any],
+                        trace_id: Optional[str] = None) -> types.CallToolResult:
+        """Call a namespaced tool on the server that owns it, if that server exposes it."""
+        server, _, tool = name.partition(self.separator)
+        connection = self.connections.get(server)
+        if connection is None or not tool or (connection.allowed_tools is not None and tool not in connection.allowed_tools):
+            raise ValueError(f"Unknown tool: {name}")
+        return await connection.call_tool(tool, arguments, trace_id)
+
+    async def read_trace(self, trace_id: str) -> Optional[dict]:
+        """A trace's spans from every server that recorded some, merged."""
+        traces = await asyncio.gather(
+            *(read_trace(connection.session, trace_id) for connection in self.connections.values() if connection.session),
+            return_exceptions=True,
+        )
+        traces = [trace for trace in traces if isinstance(trace, dict)]
+        if not traces:
+            return None
+        return {
+            "trace_id": trace_id,
+            "spans": [span for trace in traces for span in trace["spans"]],
+            "tool_ms": sum(trace["tool_ms"] for trace in traces),
+            "upstream_ms": sum(trace["upstream_ms"] for trace in traces),
+        }
+
+    async def close(self) -> None:
+        await asyncio.gather(*(connection.close() for connection in self.connections.values()))
@@ -0,0 +1,50 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, TypeVar
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+T = TypeVar("T")
+
+
+def request_key(method: str, url: str, params: dict[str, Any] | None = None, body: Any = None) -> str:
+    """Build a normalized key for an upstream request: method, URL with sorted query params, and JSON body."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query.extend((k, str(v)) for k, v in params.items())
+    url = urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, urlencode(sorted(query)), ""))
+    key = f"{method.upper()} {url}"
+    if body is not None:
+        key += " " + json.dumps(body, sort_keys=True, separators=(",", ":"))
+    return key
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one in-flight call.
+
+    The first caller for a key starts the work; callers arriving while it is still
+    running await the same result (or exception) instead of issuing their own request.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task] = {}
+        self.stats = {"calls": 0, "shared": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is not None:
+            self.stats["shared"] += 1
+        else:
+            self.stats["calls"] += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        # Shield so one cancelled caller doesn't cancel the fetch for everyone else waiting on it
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every waiter was cancelled
+            task.exception()
@@ -0,0 +1,414 @@
+"""SQLite-backed LangGraph checkpointer with bounded memory use.
+
+Compact the database from the command line:
+
+    python sqlite_checkpointer.py compact checkpoints.db --keep 5 --max-idle-days 30
+"""
+import argparse
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.types import TASKS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    task_path TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+class _Latest:
+    """The newest checkpoint of one thread, kept in memory in serialized form."""
+
+    __slots__ = ("checkpoint_id", "parent_id", "checkpoint", "metadata", "writes", "sends")
+
+    def __init__(self, checkpoint_id, parent_id, checkpoint, metadata, writes, sends):
+        self.checkpoint_id = checkpoint_id
+        self.parent_id = parent_id
+        self.checkpoint = checkpoint
+        self.metadata = metadata
+        # (task_id, idx) -> (task_id, channel, typed value, task_path)
+        self.writes = writes
+        # Serialized sends recorded on the parent checkpoint
+        self.sends = sends
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver):
+    """Checkpointer that keeps thread state in a SQLite file instead of process memory.
+
+    - Only the latest checkpoint of the `max_threads` most recently used threads is kept
+      in memory (LRU); older state is read back from disk when needed.
+    - New checkpoints and writes are buffered and written in one transaction once
+      `batch_size` rows are pending or `flush_interval` seconds have passed, and on `close()`.
+      A crash can lose at most that buffer.
+    - Only the newest `keep` checkpoints of each thread are retained (all when None).
+    """
+
+    def __init__(self, db_path: str, keep: Optional[int] = 10, max_threads: int = 256,
+                 batch_size: int = 64, flush_interval: float = 1.0,
+                 serde: Optional[SerializerProtocol] = None):
+        super().__init__(serde=serde)
+        self.keep = keep
+        self.max_threads = max_threads
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self._latest: OrderedDict[tuple[str, str], _Latest] = OrderedDict()
+        self._pending_checkpoints: dict[tuple[str, str, str], tuple] = {}
+        self._pending_writes: dict[tuple[str, str, str, str, int], tuple] = {}
+        self._last_flush = time.monotonic()
+
+    # -- reads ----------------------------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        with self._lock:
+            latest = self._latest.get((thread_id, checkpoint_ns))
+            if latest is None and checkpoint_id is None:
+                latest = self._load_latest(thread_id, checkpoint_ns)
+            if latest is not None and checkpoint_id in (None, latest.checkpoint_id):
+                self._latest.move_to_end((thread_id, checkpoint_ns))
+                return self._tuple(thread_id, checkpoint_ns, latest)
+            if checkpoint_id is None:
+                return None
+            self.flush()
+            row = self._db.execute(
+                "SELECT checkpoint_id, parent_id, type, checkpoint, metadata_type, metadata FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchone()
+            return self._tuple(thread_id, checkpoint_ns, self._from_row(thread_id, checkpoint_ns, row)) if row else None
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        query = "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, type, checkpoint, metadata_type, metadata FROM checkpoints"
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        results = []
+        with self._lock:
+            self.flush()
+            rows = self._db.execute(query, params).fetchall()
+            for thread_id, checkpoint_ns, *row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                latest = self._from_row(thread_id, checkpoint_ns, row)
+                if filter:
+                    metadata = self.serde.loads_typed(latest.metadata)
+                    if not all(metadata.get(key) == value for key, value in filter.items()):
+                        continue
+                results.append(self._tuple(thread_id, checkpoint_ns, latest))
+        yield from results
+
+    # -- writes ---------------------------------------------------------------
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        parent_id = config["configurable"].get("checkpoint_id")
+        c = checkpoint.copy()
+        c.pop("pending_sends", None)
+        typed_checkpoint = self.serde.dumps_typed(c)
+        typed_metadata = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self._lock:
+            previous = self._latest.get((thread_id, checkpoint_ns))
+            if parent_id is None:
+                sends = []
+            elif previous is not None and previous.checkpoint_id == parent_id:
+                sends = self._sends(previous.writes)
+            else:
+                sends = self._load_sends(thread_id, checkpoint_ns, parent_id)
+            self._cache((thread_id, checkpoint_ns),
+                        _Latest(checkpoint["id"], parent_id, typed_checkpoint, typed_metadata, {}, sends))
+            self._pending_checkpoints[(thread_id, checkpoint_ns, checkpoint["id"])] = (
+                thread_id, checkpoint_ns, checkpoint["id"], parent_id, *typed_checkpoint, *typed_metadata, time.time(),
+            )
+            self._maybe_flush()
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            latest = self._latest.get((thread_id, checkpoint_ns))
+            if latest is not None and latest.checkpoint_id != checkpoint_id:
+                latest = None
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                key = (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+                # Regular writes are recorded once; special channels (idx < 0) are overwritten
+                if idx >= 0 and (key in self._pending_writes or (latest and (task_id, idx) in latest.writes)):
+                    continue
+                typed = self.serde.dumps_typed(value)
+                self._pending_writes[key] = (*key, channel, *typed, task_path)
+                if latest is not None:
+                    latest.writes[(task_id, idx)] = (task_id, channel, typed, task_path)
+            self._maybe_flush()
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self.flush()
+            self._db.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            self._db.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            self._db.commit()
+            for key in [key for key in self._latest if key[0] == thread_id]:
+                del self._latest[key]
+
+    # The graph runs these on the event loop; they only touch memory except when a batch is flushed
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+
+    # -- persistence ----------------------------------------------------------
+
+    def flush(self) -> None:
+        """Write buffered checkpoints and writes, then drop checkpoints beyond `keep`."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._pending_checkpoints and not self._pending_writes:
+                return
+            threads = {key[:2] for key in self._pending_checkpoints}
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._pending_checkpoints.values(),
+                )
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [row for row in self._pending_writes.values() if row[4] >= 0],
+                )
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [row for row in self._pending_writes.values() if row[4] < 0],
+                )
+                for thread_id, checkpoint_ns in threads:
+                    self._apply_retention(thread_id, checkpoint_ns, self.keep)
+            self._pending_checkpoints.clear()
+            self._pending_writes.clear()
+
+    def compact(self, keep: Optional[int] = None, max_idle: Optional[float] = None) -> tuple[int, int]:
+        """Apply retention to every thread and delete threads idle for more than `max_idle` seconds.
+
+        Returns (checkpoints removed, threads removed). The file is vacuumed afterwards.
+        """
+        keep = self.keep if keep is None else keep
+        with self._lock:
+            self.flush()
+            before = self._db.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+            idle_threads = []
+            with self._db:
+                if max_idle is not None:
+                    idle_threads = [row[0] for row in self._db.execute(
+                        "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(updated_at) < ?",
+                        (time.time() - max_idle,),
+                    )]
+                    self._db.executemany("DELETE FROM checkpoints WHERE thread_id = ?", [(t,) for t in idle_threads])
+                    self._db.executemany("DELETE FROM writes WHERE thread_id = ?", [(t,) for t in idle_threads])
+                for thread_id, checkpoint_ns in self._db.execute(
+                    "SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints"
+                ).fetchall():
+                    self._apply_retention(thread_id, checkpoint_ns, keep)
+            removed = before - self._db.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+            self._db.execute("VACUUM")
+            for key in [key for key in self._latest if key[0] in set(idle_threads)]:
+                del self._latest[key]
+            return removed, len(idle_threads)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self.flush()
+                self._db.close()
+                self._db = None
+
+    def __enter__(self) -> "SQLiteCheckpointer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # -- helpers --------------------------------------------------------------
+
+    def _maybe_flush(self) -> None:
+        pending = len(self._pending_checkpoints) + len(self._pending_writes)
+        if pending >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _cache(self, key: tuple[str, str], latest: _Latest) -> None:
+        self._latest[key] = latest
+        self._latest.move_to_end(key)
+        while len(self._latest) > self.max_threads:
+            self._latest.popitem(last=False)
+
+    def _apply_retention(self, thread_id: str, checkpoint_ns: str, keep: Optional[int]) -> None:
+        if keep is None:
+            return
+        self._db.execute(
+            "DELETE FROM checkpoints WHERE thread_id = ?1 AND checkpoint_ns = ?2 AND checkpoint_id NOT IN "
+            "(SELECT checkpoint_id FROM checkpoints WHERE thread_id = ?1 AND checkpoint_ns = ?2 "
+            "ORDER BY checkpoint_id DESC LIMIT ?3)",
+            (thread_id, checkpoint_ns, keep),
+        )
+        self._db.execute(
+            "DELETE FROM writes WHERE thread_id = ?1 AND checkpoint_ns = ?2 AND checkpoint_id NOT IN "
+            "(SELECT checkpoint_id FROM checkpoints WHERE thread_id = ?1 AND checkpoint_ns = ?2)",
+            (thread_id, checkpoint_ns),
+        )
+
+    def _load_latest(self, thread_id: str, checkpoint_ns: str) -> Optional[_Latest]:
+        self.flush()
+        row = self._db.execute(
+            "SELECT checkpoint_id, parent_id, type, checkpoint, metadata_type, metadata FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+            (thread_id, checkpoint_ns),
+        ).fetchone()
+        if row is None:
+            return None
+        latest = self._from_row(thread_id, checkpoint_ns, row)
+        self._cache((thread_id, checkpoint_ns), latest)
+        return latest
+
+    def _from_row(self, thread_id: str, checkpoint_ns: str, row: Sequence) -> _Latest:
+        checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata = row
+        writes = {
+            (task_id, idx): (task_id, channel, (value_type, value), task_path)
+            for task_id, idx, channel, value_type, value, task_path in self._db.execute(
+                "SELECT task_id, idx, channel, type, value, task_path FROM writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+        }
+        sends = self._load_sends(thread_id, checkpoint_ns, parent_id) if parent_id else []
+        return _Latest(checkpoint_id, parent_id, (type_, checkpoint), (metadata_type, metadata), writes, sends)
+
+    def _load_sends(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list:
+        self.flush()
+        rows = self._db.execute(
+            "SELECT task_id, idx, channel, type, value, task_path FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? AND channel = ?",
+            (thread_id, checkpoint_ns, checkpoint_id, TASKS),
+        )
+        return self._sends({
+            (task_id, idx): (task_id, channel, (type_, value), task_path)
+            for task_id, idx, channel, type_, value, task_path in rows
+        })
+
+    @staticmethod
+    def _sends(writes: dict) -> list:
+        # Same order as the in-memory saver: by task path, task ID, then write index
+        tasks = sorted(
+            ((key, write) for key, write in writes.items() if write[1] == TASKS),
+            key=lambda item: (item[1][3], item[1][0], item[0][1]),
+        )
+        return [write[2] for _, write in tasks]
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, latest: _Latest) -> CheckpointTuple:
+        checkpoint = self.serde.loads_typed(latest.checkpoint)
+        checkpoint["pending_sends"] = [self.serde.loads_typed(send) for send in latest.sends]
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                     "checkpoint_id": latest.checkpoint_id}},
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed(latest.metadata),
+            pending_writes=[(task_id, channel, self.serde.loads_typed(value))
+                            for task_id, channel, value, _ in latest.writes.values()],
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                  "checkpoint_id": latest.parent_id}}
+                if latest.parent_id else None
+            ),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("db_path")
+    parser.add_argument("--keep", type=int, default=10, help="Checkpoints to keep per thread")
+    parser.add_argument("--max-idle-days", type=float, help="Delete threads not updated for this many days")
+    args = parser.parse_args()
+
+    max_idle = args.max_idle_days * 24 * 3600 if args.max_idle_days is not None else None
+    with SQLiteCheckpointer(args.db_path, keep=args.keep) as checkpointer:
+        removed, threads = checkpointer.compact(keep=args.keep, max_idle=max_idle)
+    print(f"Removed {removed} checkpoints ({threads} idle threads)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# The server and client modules are flat siblings, not a package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
@@ -0,0 +1,30 @@
+"""Tiny stdio MCP server for the session manager tests."""
+import asyncio
+import os
+
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("toy")
+
+
+@mcp.tool()
+async def ping() -> str:
+    """The server's process ID."""
+    return str(os.getpid())
+
+
+@mcp.tool()
+async def other() -> str:
+    """A tool the test config leaves out of the allowlist."""
+    return "other"
+
+
+@mcp.tool()
+async def die() -> str:
+    """Exit the process in the middle of the call."""
+    await asyncio.sleep(0.1)
+    os._exit(1)
+
+
+if __name__ == "__main__":
+    mcp.run(transport="stdio")
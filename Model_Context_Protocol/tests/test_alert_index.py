@@ -0,0 +1,55 @@
+from alert_index import AlertIndex
+
+
+def alert(alert_id: str, zones: list[str], severity: str = "Severe", event: str = "Flood Warning") -> dict:
+    return {"id": alert_id, "properties": {"id": alert_id, "severity": severity, "event": event, "geocode": {"UGC": zones}}}
+
+
+def ids(features: list[dict]) -> list[str]:
+    return [feature["id"] for feature in features]
+
+
+def test_first_apply_reports_every_state_and_loads_the_index():
+    index = AlertIndex()
+    assert not index.loaded
+    assert index.apply([alert("1", ["CAZ041", "NVZ002"]), alert("2", ["TXC201"])]) == {"CA", "NV", "TX"}
+    assert index.loaded
+    assert len(index) == 2
+
+
+def test_unchanged_feed_reports_nothing():
+    index = AlertIndex()
+    feed = [alert("1", ["CAZ041"])]
+    index.apply(feed)
+    assert index.apply([alert("1", ["CAZ041"])]) == set()
+
+
+def test_added_removed_and_changed_alerts_report_their_states():
+    index = AlertIndex()
+    index.apply([alert("1", ["CAZ041"]), alert("2", ["TXZ001"]), alert("3", ["NYZ072"])])
+    changed = index.apply([
+        alert("1", ["CAZ041"]),
+        # Changed: moved from TX to OK, so both states changed
+        alert("2", ["OKZ010"], severity="Extreme"),
+        # Added
+        alert("4", ["FLZ050"]),
+        # "3" expired
+    ])
+    assert changed == {"TX", "OK", "FL", "NY"}
+    assert ids(index.query(state="ny")) == []
+    assert ids(index.query(state="tx")) == []
+    assert ids(index.query(state="ok", severity="extreme")) == ["2"]
+
+
+def test_query_combines_filters_case_insensitively():
+    index = AlertIndex()
+    index.apply([
+        alert("1", ["CAZ041"], severity="Severe", event="Flood Warning"),
+        alert("2", ["CAZ042"], severity="Minor", event="Wind Advisory"),
+        alert("3", ["NVZ002"], severity="Severe", event="Flood Warning"),
+    ])
+    assert ids(index.query(state="CA")) == ["1", "2"]
+    assert ids(index.query(state="ca", severity="SEVERE")) == ["1"]
+    assert ids(index.query(zone="nvz002")) == ["3"]
+    assert ids(index.query(event="flood warning")) == ["1", "3"]
+    assert ids(index.query()) == ["1", "2", "3"]
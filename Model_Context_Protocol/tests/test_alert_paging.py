@@ -0,0 +1,61 @@
+import pytest
+
+from alert_paging import decode_cursor, encode_cursor, page_alerts, sort_key
+
+
+def alert(alert_id: str, severity: str | None, urgency: str | None = "Expected") -> dict:
+    return {"id": alert_id, "properties": {"id": alert_id, "severity": severity, "urgency": urgency}}
+
+
+ALERTS = [
+    alert("c", "Minor"),
+    alert("a", "Severe", "Immediate"),
+    alert("e", None),
+    alert("b", "Extreme"),
+    alert("d", "Severe", "Future"),
+    alert("f", "Moderate"),
+]
+
+
+def test_sort_key_orders_by_severity_then_urgency_then_id():
+    assert [a["id"] for a in sorted(ALERTS, key=sort_key)] == ["b", "a", "d", "f", "c", "e"]
+
+
+def test_cursor_round_trips():
+    key = sort_key(ALERTS[1])
+    cursor = encode_cursor(key)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == key
+
+
+# Not base64, not JSON, too few parts, non-integer ranks
+@pytest.mark.parametrize("cursor", ["!!!", "bm90IGpzb24", encode_cursor((1, 2)), encode_cursor(("x", "y", "z"))])
+def test_bad_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_pages_cover_every_alert_once_in_order():
+    seen, cursor = [], None
+    while True:
+        page, cursor, total = page_alerts(iter(ALERTS), 4, cursor)
+        assert total == len(ALERTS)
+        seen += [a["id"] for a in page]
+        if cursor is None:
+            break
+    assert seen == ["b", "a", "d", "f", "c", "e"]
+
+
+def test_last_full_page_has_no_next_cursor():
+    page, cursor, _ = page_alerts(ALERTS, len(ALERTS))
+    assert len(page) == len(ALERTS)
+    assert cursor is None
+
+
+def test_cursor_stays_valid_when_alerts_change():
+    page, cursor, _ = page_alerts(ALERTS, 2)
+    assert [a["id"] for a in page] == ["b", "a"]
+    # "a" expires and a new Extreme alert arrives, which sorts before the cursor
+    changed = [a for a in ALERTS if a["id"] != "a"] + [alert("0", "Extreme")]
+    page, _, _ = page_alerts(changed, 2, cursor)
+    assert [a["id"] for a in page] == ["d", "f"]
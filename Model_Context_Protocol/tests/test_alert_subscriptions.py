@@ -0,0 +1,43 @@
+import anyio
+import pytest
+from mcp import types
+from mcp.shared.memory import create_connected_server_and_client_session
+from pydantic import AnyUrl
+
+import mcp_server
+from alert_index import AlertIndex
+
+
+def feature(alert_id: str, zone: str) -> dict:
+    return {"id": alert_id, "properties": {"event": "Flood Warning", "severity": "Severe", "geocode": {"UGC": [zone]}}}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("uri", ["alerts://ca", "alerts://CA"])
+async def test_subscriber_is_notified_whatever_the_state_case(uri):
+    updated: list[str] = []
+    received = anyio.Event()
+
+    async def message_handler(message) -> None:
+        if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ResourceUpdatedNotification):
+            updated.append(str(message.root.params.uri))
+            received.set()
+
+    async with create_connected_server_and_client_session(mcp_server.mcp._mcp_server, message_handler=message_handler) as client:
+        await client.subscribe_resource(AnyUrl(uri))
+        # The index reports changed states in upper case, from the alerts' UGC zone codes
+        changed = AlertIndex().apply([feature("urn:1", "CAZ041")])
+        assert changed == {"CA"}
+        await mcp_server.notify_alert_subscribers(changed)
+        with anyio.fail_after(5):
+            await received.wait()
+        assert updated == [uri]
+
+        await client.unsubscribe_resource(AnyUrl(uri))
+        assert not mcp_server.alert_subscriptions["alerts://CA"]
+
+
+def test_subscription_key_only_normalizes_the_state():
+    assert mcp_server.alert_subscription_key("alerts://ny") == "alerts://NY"
+    assert mcp_server.alert_subscription_key("alerts://ny/page/first") == "alerts://ny/page/first"
+    assert mcp_server.alert_subscription_key("stats://http-cache") == "stats://http-cache"
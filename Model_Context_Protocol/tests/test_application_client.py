@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from application_client import MCPClient
+from model_backends import ScriptedStreamer
+
+
+class RecordingStreamer(ScriptedStreamer):
+    """ScriptedStreamer that also keeps the messages sent with each model call."""
+
+    def __init__(self, turns: list[dict]):
+        super().__init__(turns)
+        self.requests: list[list[dict]] = []
+
+    def converse_stream(self, **kwargs):
+        self.requests.append(list(kwargs["messages"]))
+        return super().converse_stream(**kwargs)
+
+
+def tool_turn(*calls: tuple[str, str, dict]) -> dict:
+    return {"role": "assistant", "content": [
+        {"toolUse": {"toolUseId": tool_use_id, "name": name, "input": arguments}} for tool_use_id, name, arguments in calls
+    ]}
+
+
+def text_turn(text: str) -> dict:
+    return {"role": "assistant", "content": [{"text": text}]}
+
+
+@pytest.fixture
+def toy_server():
+    server = FastMCP("toy")
+    server.running = 0
+    server.peak = 0
+    server.calls = []
+
+    @server.tool()
+    async def wait(label: str, seconds: float) -> str:
+        """Sleep for `seconds`, then echo `label`."""
+        server.calls.append(label)
+        server.running += 1
+        server.peak = max(server.peak, server.running)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            server.running -= 1
+        return f"waited {label}"
+
+    return server
+
+
+async def run_query(server: FastMCP, turns: list[dict], max_steps: int = 5) -> tuple[MCPClient, RecordingStreamer, str]:
+    backend = RecordingStreamer(turns)
+    client = MCPClient(max_steps=max_steps, model_backend=backend)
+    async with create_connected_server_and_client_session(server._mcp_server) as session:
+        client.session = client.tool_registry.session = session
+        answer = await client.process_query("What now?")
+    return client, backend, answer
+
+
+@pytest.fixture(autouse=True)
+def no_llm_cache(monkeypatch):
+    monkeypatch.delenv("LLM_CACHE_MODE", raising=False)
+
+
+@pytest.mark.anyio
+async def test_tool_uses_of_one_turn_run_concurrently(toy_server):
+    turns = [
+        tool_turn(("t1", "wait", {"label": "a", "seconds": 0.2}), ("t2", "wait", {"label": "b", "seconds": 0.2})),
+        text_turn("Both done."),
+    ]
+    _, backend, answer = await run_query(toy_server, turns)
+
+    assert toy_server.peak == 2
+    assert sorted(toy_server.calls) == ["a", "b"]
+    assert backend.calls == 2
+    # Both results go back together, in the order the model asked for them
+    results = backend.requests[1][-1]
+    assert results["role"] == "user"
+    assert [block["toolResult"]["toolUseId"] for block in results["content"]] == ["t1", "t2"]
+    assert [block["toolResult"]["content"][0]["text"] for block in results["content"]] == ["waited a", "waited b"]
+    assert all(block["toolResult"]["status"] == "success" for block in results["content"])
+    assert answer.endswith("Both done.")
+
+
+@pytest.mark.anyio
+async def test_runaway_tool_loop_stops_after_max_steps(toy_server):
+    # The last scripted turn repeats, so this model asks for a tool forever
+    turns = [tool_turn(("t1", "wait", {"label": "again", "seconds": 0}))]
+    _, backend, answer = await run_query(toy_server, turns, max_steps=3)
+
+    assert len(toy_server.calls) == 3
+    assert backend.calls == 4
+    assert answer.endswith("[Stopped after 3 tool steps]")
+
+
+@pytest.mark.anyio
+async def test_failed_tool_call_is_reported_to_the_model(toy_server):
+    turns = [tool_turn(("t1", "missing", {})), text_turn("Sorry.")]
+    _, backend, _ = await run_query(toy_server, turns)
+
+    [result] = backend.requests[1][-1]["content"]
+    assert result["toolResult"]["status"] == "error"
@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+import pytest
+
+from conversation_host import ConversationHost
+
+
+async def serve(lines: list[str]) -> list[dict]:
+    async def run_turn(session: str, message: str) -> str:
+        return f"{session}: {message}"
+
+    host = ConversationHost(run_turn)
+    requests = iter(lines + [""])
+    replies: list[dict] = []
+
+    async def read_line() -> str:
+        return next(requests)
+
+    async def write_line(line: str) -> None:
+        replies.append(json.loads(line))
+
+    await asyncio.wait_for(host.serve_stream(read_line, write_line), 5)
+    return replies
+
+
+@pytest.mark.anyio
+async def test_replies_to_a_turn():
+    replies = await serve(['{"id": 1, "session": "alice", "message": "hi"}'])
+    assert replies == [{"id": 1, "session": "alice", "response": "alice: hi"}]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("line", ["[1]", '"hi"', "null"])
+async def test_non_object_request_gets_an_error_reply(line):
+    replies = await serve([line, '{"id": 2, "session": "bob", "message": "still there?"}'])
+    assert {"id": None, "session": None, "error": "Request must be a JSON object"} in replies
+    assert {"id": 2, "session": "bob", "response": "bob: still there?"} in replies
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("request_", [{"id": 3, "message": "hi"}, {"id": 3, "session": "alice"}])
+async def test_request_without_session_or_message_gets_an_error_reply(request_):
+    [reply] = await serve([json.dumps(request_)])
+    assert reply["id"] == 3
+    assert reply["error"] == "Request needs 'session' and 'message'"
+
+
+@pytest.mark.anyio
+async def test_invalid_json_gets_an_error_reply():
+    [reply] = await serve(["{not json"])
+    assert reply["error"].startswith("Invalid JSON")
@@ -0,0 +1,246 @@
+import asyncio
+import time
+import types
+
+import httpx
+import pytest
+
+import fetch_policy
+from fetch_policy import CircuitBreaker, CircuitOpenError, ResilientTransport
+
+
+class Clock:
+    """Stand-in for the `time` module whose monotonic clock only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.perf_counter = time.perf_counter
+        self.time = time.time
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(fetch_policy, "time", clock)
+    return clock
+
+
+def open_breaker(clock, threshold: int = 2) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=threshold, reset_timeout=30)
+    for _ in range(threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_lets_one_probe_through(clock):
+    breaker = open_breaker(clock)
+    clock.now += 30
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_probe_success_closes(clock):
+    breaker = open_breaker(clock)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_probe_failure_reopens(clock):
+    breaker = open_breaker(clock)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+def test_released_probe_reopens_instead_of_sticking(clock):
+    breaker = open_breaker(clock)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == "open"
+    clock.now += 30
+    assert breaker.allow()
+
+
+def test_release_when_closed_changes_nothing(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.release()
+    assert breaker.state == "closed"
+    assert breaker.failures == 1
+
+
+def client_for(handler, **kwargs) -> tuple[httpx.AsyncClient, ResilientTransport]:
+    kwargs = {"retries": 0, "backoff": 0, "failure_threshold": 2, "reset_timeout": 30, **kwargs}
+    transport = ResilientTransport(httpx.MockTransport(handler), **kwargs)
+    return httpx.AsyncClient(transport=transport), transport
+
+
+def statuses(*codes):
+    """Handler answering with `codes` in turn (the last one repeats), counting requests."""
+    codes = list(codes)
+    calls = types.SimpleNamespace(count=0)
+
+    async def handler(request):
+        calls.count += 1
+        return httpx.Response(codes.pop(0) if len(codes) > 1 else codes[0])
+
+    return handler, calls
+
+
+async def trip(client: httpx.AsyncClient, transport: ResilientTransport, clock) -> None:
+    """Open the circuit for host `a` with 503s, then let the reset timeout pass."""
+    for _ in range(2):
+        assert (await client.get("http://a/")).status_code == 503
+    with pytest.raises(CircuitOpenError):
+        await client.get("http://a/")
+    assert transport.stats["rejected"] == 1
+    clock.now += 30
+
+
+@pytest.mark.anyio
+async def test_transport_probe_success_closes_circuit(clock):
+    handler, calls = statuses(503, 503, 200)
+    client, transport = client_for(handler)
+    await trip(client, transport, clock)
+    assert (await client.get("http://a/")).status_code == 200
+    assert transport.breaker("a").state == "closed"
+    assert calls.count == 3
+
+
+@pytest.mark.anyio
+async def test_transport_probe_failure_reopens_circuit(clock):
+    handler, _ = statuses(503)
+    client, transport = client_for(handler)
+    await trip(client, transport, clock)
+    assert (await client.get("http://a/")).status_code == 503
+    assert transport.breaker("a").state == "open"
+    with pytest.raises(CircuitOpenError):
+        await client.get("http://a/")
+
+
+@pytest.mark.anyio
+async def test_transport_probe_answered_429_closes_circuit(clock):
+    handler, _ = statuses(503, 503, 429, 200)
+    client, transport = client_for(handler)
+    await trip(client, transport, clock)
+    assert (await client.get("http://a/")).status_code == 429
+    assert transport.breaker("a").state == "closed"
+    assert (await client.get("http://a/")).status_code == 200
+
+
+@pytest.mark.anyio
+async def test_transport_cancelled_probe_does_not_stick_open(clock):
+    hang = asyncio.Event()
+    codes = [503, 503]
+
+    async def handler(request):
+        if codes:
+            return httpx.Response(codes.pop(0))
+        if not hang.is_set():
+            hang.set()
+            await asyncio.sleep(60)
+        return httpx.Response(200)
+
+    client, transport = client_for(handler)
+    await trip(client, transport, clock)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(client.get("http://a/"), timeout=0.05)
+    assert transport.breaker("a").state == "open"
+    clock.now += 30
+    assert (await client.get("http://a/")).status_code == 200
+    assert transport.breaker("a").state == "closed"
+
+
+@pytest.mark.anyio
+async def test_transport_probe_unexpected_error_does_not_stick_open(clock):
+    codes = [503, 503]
+
+    async def handler(request):
+        if codes:
+            return httpx.Response(codes.pop(0))
+        raise RuntimeError("boom")
+
+    client, transport = client_for(handler)
+    await trip(client, transport, clock)
+    with pytest.raises(RuntimeError):
+        await client.get("http://a/")
+    clock.now += 30
+    assert transport.breaker("a").allow()
+
+
+@pytest.mark.anyio
+async def test_transport_retries_idempotent_requests(clock):
+    handler, calls = statuses(503, 502, 200)
+    client, transport = client_for(handler, retries=2, failure_threshold=5)
+    assert (await client.get("http://a/")).status_code == 200
+    assert calls.count == 3
+    assert transport.stats["retries"] == 2
+
+
+@pytest.mark.anyio
+async def test_transport_does_not_retry_post_on_status(clock):
+    handler, calls = statuses(503, 200)
+    client, _ = client_for(handler, retries=2, failure_threshold=5)
+    assert (await client.post("http://a/", json={})).status_code == 503
+    assert calls.count == 1
+
+
+@pytest.mark.anyio
+async def test_transport_retries_timeouts_then_raises(clock):
+    calls = types.SimpleNamespace(count=0)
+
+    async def handler(request):
+        calls.count += 1
+        raise httpx.ReadTimeout("slow", request=request)
+
+    client, _ = client_for(handler, retries=2, failure_threshold=5)
+    with pytest.raises(httpx.ReadTimeout) as excinfo:
+        await client.get("http://a/")
+    assert calls.count == 3
+    assert isinstance(fetch_policy.upstream_error(excinfo.value, "http://a/"), fetch_policy.UpstreamTimeout)
+
+
+@pytest.mark.anyio
+async def test_transport_hedges_slow_requests(clock):
+    calls = types.SimpleNamespace(count=0)
+
+    async def handler(request):
+        calls.count += 1
+        # Request 21 (after 20 fast samples) is slow; its hedge answers quickly
+        await asyncio.sleep(1 if calls.count == 21 else 0)
+        return httpx.Response(200, text=str(calls.count))
+
+    client, transport = client_for(handler, hedge=True, hedge_min_delay=0.01)
+    for _ in range(20):
+        await client.get("http://a/")
+    response = await client.get("http://a/")
+    assert response.text == "22"
+    assert transport.stats["hedged"] == 1
+    assert transport.stats["hedge_wins"] == 1
@@ -0,0 +1,85 @@
+import asyncio
+
+import httpx
+import pytest
+
+from fake_upstreams import FakeUpstreams
+from http_cache import ResponseCache
+
+
+@pytest.fixture
+def upstream():
+    fake = FakeUpstreams().start()
+    yield fake
+    fake.stop()
+
+
+async def get_twice(upstream: FakeUpstreams, cache: ResponseCache) -> tuple:
+    url = f"{upstream.base_url}/nws/alerts/active/area/CA"
+    async with httpx.AsyncClient() as client:
+        first = await cache.get_json(client, url)
+        second = await cache.get_json(client, url)
+        # Let any background refresh finish while the client is still open
+        await asyncio.gather(*cache._refreshing.values())
+    return first, second
+
+
+@pytest.mark.anyio
+async def test_fresh_hit(upstream):
+    cache = ResponseCache()
+    first, second = await get_twice(upstream, cache)
+    assert second == first
+    assert upstream.counts["nws"] == 1
+    assert cache.stats["hits"] == 1
+
+
+@pytest.mark.anyio
+async def test_expired_entry_is_revalidated_with_a_304(upstream):
+    upstream.max_age = 0
+    cache = ResponseCache(stale_ttl=0)
+    first, second = await get_twice(upstream, cache)
+    assert second == first
+    assert upstream.counts["nws"] == 2
+    assert cache.stats["revalidations"] == 1
+    assert cache.stats["not_modified"] == 1
+    assert cache.stats["stale_hits"] == 0
+
+
+@pytest.mark.anyio
+async def test_stale_hit_is_refreshed_in_the_background(upstream):
+    upstream.max_age = 0
+    cache = ResponseCache(stale_ttl=60)
+    first, second = await get_twice(upstream, cache)
+    assert second == first
+    assert cache.stats["stale_hits"] == 1
+    # The background refresh revalidated the entry
+    assert upstream.counts["nws"] == 2
+    assert cache.stats["not_modified"] == 1
+
+
+@pytest.mark.anyio
+async def test_no_store_is_not_cached(upstream):
+    upstream.cache_control = "no-store"
+    cache = ResponseCache(default_ttl=60)
+    await get_twice(upstream, cache)
+    assert upstream.counts["nws"] == 2
+    assert cache.stats["misses"] == 2
+    assert not cache._entries
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("cache_control", ["no-cache", "max-age=0, must-revalidate"])
+async def test_revalidate_directives_are_not_served_stale(upstream, cache_control):
+    upstream.cache_control = cache_control
+    cache = ResponseCache(stale_ttl=60)
+    await get_twice(upstream, cache)
+    assert cache.stats["stale_hits"] == 0
+    assert cache.stats["not_modified"] == 1
+
+
+@pytest.mark.anyio
+async def test_stale_while_revalidate_overrides_no_cache(upstream):
+    upstream.cache_control = "no-cache, stale-while-revalidate=30"
+    cache = ResponseCache(stale_ttl=0)
+    await get_twice(upstream, cache)
+    assert cache.stats["stale_hits"] == 1
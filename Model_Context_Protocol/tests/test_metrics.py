@@ -0,0 +1,69 @@
+import pytest
+
+from metrics import Metrics, report_tool_error
+
+
+@pytest.mark.anyio
+async def test_text_size_is_counted_in_utf8_bytes():
+    metrics = Metrics()
+
+    async def forecast() -> str:
+        return "72°F"
+
+    assert await metrics.instrument_tool(forecast)() == "72°F"
+    stats = metrics.snapshot()["tools"]["forecast"]
+    assert stats["bytes"] == 5
+    assert stats["errors"] == 0
+
+
+@pytest.mark.anyio
+async def test_structured_result_size_is_its_json_size():
+    metrics = Metrics()
+
+    async def places() -> list:
+        return [{"name": "Café"}]
+
+    await metrics.instrument_tool(places)()
+    assert metrics.snapshot()["tools"]["places"]["bytes"] == len('[{"name": "Caf\\u00e9"}]')
+
+
+@pytest.mark.anyio
+async def test_returned_failure_counts_as_an_error():
+    metrics = Metrics()
+
+    async def alerts(fail: bool) -> str:
+        if fail:
+            report_tool_error()
+            return "Unable to fetch alerts: api.weather.gov returned HTTP 503."
+        return "No active alerts for this state."
+
+    tool = metrics.instrument_tool(alerts)
+    await tool(True)
+    await tool(False)
+    stats = metrics.snapshot()["tools"]["alerts"]
+    assert (stats["count"], stats["errors"]) == (2, 1)
+
+
+@pytest.mark.anyio
+async def test_raised_exception_counts_as_an_error():
+    metrics = Metrics()
+
+    async def broken() -> str:
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await metrics.instrument_tool(broken)()
+    assert metrics.snapshot()["tools"]["broken"]["errors"] == 1
+
+
+@pytest.mark.anyio
+async def test_spans_are_recorded_under_the_trace_id():
+    metrics = Metrics()
+
+    async def forecast() -> str:
+        report_tool_error()
+        return "failed"
+
+    await metrics.instrument_tool(forecast, lambda: "trace-1")()
+    [span] = metrics.trace("trace-1")["spans"]
+    assert (span["name"], span["error"], span["bytes"]) == ("forecast", True, 6)
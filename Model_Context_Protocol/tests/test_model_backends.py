@@ -0,0 +1,38 @@
+import pytest
+
+from model_backends import ScriptedStreamer, stream_turn
+
+
+@pytest.mark.anyio
+async def test_stream_turn_measures_time_to_first_token():
+    backend = ScriptedStreamer([{"role": "assistant", "content": [{"text": "one two three four"}]}], token_delay=0.05)
+    deltas: list[str] = []
+    turn = await stream_turn(backend, on_text=deltas.append)
+
+    assert "".join(deltas) == "one two three four"
+    assert len(deltas) == 4
+    # The first word arrives after one token delay, the whole message after four
+    assert turn.time_to_first_token >= 0.04
+    assert turn.total_latency - turn.time_to_first_token >= 0.14
+    assert turn.stop_reason == "end_turn"
+    assert turn.message == {"role": "assistant", "content": [{"text": "one two three four"}]}
+
+
+@pytest.mark.anyio
+async def test_stream_turn_reassembles_text_and_tool_uses():
+    message = {"role": "assistant", "content": [
+        {"text": "Checking the forecast."},
+        {"toolUse": {"toolUseId": "t1", "name": "get_forecast", "input": {"latitude": 37.77, "longitude": -122.42}}},
+        {"toolUse": {"toolUseId": "t2", "name": "get_alerts", "input": {}}},
+    ]}
+    turn = await stream_turn(ScriptedStreamer([message]))
+
+    assert turn.message == message
+    assert turn.stop_reason == "tool_use"
+
+
+@pytest.mark.anyio
+async def test_stream_turn_without_deltas_has_no_time_to_first_token():
+    turn = await stream_turn(ScriptedStreamer([{"role": "assistant", "content": []}]))
+    assert turn.time_to_first_token is None
+    assert turn.message["content"] == []
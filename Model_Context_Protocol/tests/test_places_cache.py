@@ -0,0 +1,79 @@
+import types
+
+import pytest
+
+import places_cache
+from places_cache import PlacesCache, haversine_m
+
+ORIGIN = (51.5095, -0.1)
+NORTH = {"id": "north", "location": {"latitude": 51.5120, "longitude": -0.1}}
+SOUTH = {"id": "south", "location": {"latitude": 51.5080, "longitude": -0.1}}
+NOWHERE = {"id": "nowhere"}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Wall clock for places_cache that only moves when told to."""
+    clock = types.SimpleNamespace(now=1_000_000.0)
+    clock.time = lambda: clock.now
+    monkeypatch.setattr(places_cache, "time", clock)
+    return clock
+
+
+def ids(places):
+    return [place["id"] for place in places]
+
+
+def test_haversine_matches_the_plain_loop(monkeypatch):
+    latitudes, longitudes = [51.5120, 48.8566, -33.8688], [-0.1, 2.3522, 151.2093]
+    vectorized = haversine_m(*ORIGIN, latitudes, longitudes)
+    monkeypatch.setattr(places_cache, "np", None)
+    assert haversine_m(*ORIGIN, latitudes, longitudes) == pytest.approx(vectorized)
+    assert vectorized[0] == pytest.approx(278, abs=1)
+
+
+def test_rank_puts_places_without_a_location_last():
+    assert ids(PlacesCache.rank([NOWHERE, NORTH, SOUTH], *ORIGIN)) == ["south", "north", "nowhere"]
+
+
+def test_nearby_search_hits_and_is_reranked_from_the_new_origin(clock):
+    cache = PlacesCache(max_shift_m=250)
+    cache.set(" Coffee  SHOP", (), *ORIGIN, PlacesCache.rank([NORTH, SOUTH], *ORIGIN))
+    # ~220 m north, in the neighbouring grid cell
+    moved = (51.5115, -0.1)
+    assert cache.cell(*moved) != cache.cell(*ORIGIN)
+    assert ids(cache.get("coffee shop", (), *moved)) == ["north", "south"]
+    assert cache.stats == {"hits": 1, "misses": 0}
+
+
+def test_search_too_far_away_misses(clock):
+    cache = PlacesCache(max_shift_m=250)
+    cache.set("coffee", (), *ORIGIN, [NORTH, SOUTH])
+    assert cache.get("coffee", (), 51.5125, -0.1) is None
+    assert cache.stats == {"hits": 0, "misses": 1}
+
+
+def test_other_query_or_options_miss(clock):
+    cache = PlacesCache()
+    cache.set("coffee", ("nearest_place",), *ORIGIN, [NORTH])
+    assert cache.get("tea", ("nearest_place",), *ORIGIN) is None
+    assert cache.get("coffee", ("navigation",), *ORIGIN) is None
+    assert cache.get("coffee", ("nearest_place",), *ORIGIN) is not None
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PlacesCache(ttl=60)
+    cache.set("coffee", (), *ORIGIN, [NORTH])
+    clock.now += 60
+    assert cache.get("coffee", (), *ORIGIN) is None
+    assert not cache._entries
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = PlacesCache(max_entries=2)
+    for query in ("a", "b"):
+        cache.set(query, (), *ORIGIN, [NORTH])
+    cache.get("a", (), *ORIGIN)
+    cache.set("c", (), *ORIGIN, [NORTH])
+    assert cache.get("b", (), *ORIGIN) is None
+    assert cache.get("a", (), *ORIGIN) is not None
@@ -0,0 +1,81 @@
+import types
+
+import pytest
+
+import points_cache
+from points_cache import PointsCache
+
+GRID = {"forecast": "https://api.weather.gov/gridpoints/LWX/96,70/forecast"}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Wall clock for points_cache that only moves when told to."""
+    clock = types.SimpleNamespace(now=1_000_000.0)
+    clock.time = lambda: clock.now
+    monkeypatch.setattr(points_cache, "time", clock)
+    return clock
+
+
+def test_nearby_coordinates_share_an_entry(clock):
+    cache = PointsCache(precision=4)
+    cache.set(38.88954, -77.03527, GRID)
+    assert cache.get(38.889541, -77.035271) == GRID
+    assert cache.get(38.8897, -77.0352) is None
+    assert cache.stats == {"hits": 1, "misses": 1}
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PointsCache(ttl=60)
+    cache.set(1, 2, GRID)
+    clock.now += 59
+    assert cache.get(1, 2) == GRID
+    clock.now += 1
+    assert cache.get(1, 2) is None
+    assert not cache._entries
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = PointsCache(max_entries=2)
+    cache.set(1, 1, {"n": 1})
+    cache.set(2, 2, {"n": 2})
+    cache.get(1, 1)
+    cache.set(3, 3, {"n": 3})
+    assert cache.get(2, 2) is None
+    assert cache.get(1, 1) == {"n": 1}
+    assert cache.get(3, 3) == {"n": 3}
+
+
+def test_entries_persist_across_instances(clock, tmp_path):
+    db_path = str(tmp_path / "points.db")
+    cache = PointsCache(db_path=db_path)
+    cache.set(1, 2, GRID)
+    cache.close()
+
+    reopened = PointsCache(db_path=db_path)
+    assert reopened.get(1, 2) == GRID
+    assert reopened.stats == {"hits": 1, "misses": 0}
+    reopened.close()
+
+
+def test_expired_rows_are_not_loaded_and_are_pruned_on_open(clock, tmp_path):
+    db_path = str(tmp_path / "points.db")
+    cache = PointsCache(ttl=60, db_path=db_path)
+    cache.set(1, 2, GRID)
+    cache.close()
+
+    clock.now += 61
+    reopened = PointsCache(ttl=60, db_path=db_path)
+    assert reopened._db.execute("SELECT COUNT(*) FROM points").fetchone()[0] == 0
+    assert reopened.get(1, 2) is None
+    reopened.close()
+
+
+def test_evicted_entry_is_reloaded_from_disk(clock, tmp_path):
+    cache = PointsCache(max_entries=1, db_path=str(tmp_path / "points.db"))
+    cache.set(1, 1, {"n": 1})
+    cache.set(2, 2, {"n": 2})
+    assert list(cache._entries) == [cache.key(2, 2)]
+    assert cache.get(1, 1) == {"n": 1}
+    assert list(cache._entries) == [cache.key(1, 1)]
+    cache.close()
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import signal
+import sys
+
+import pytest
+from mcp import StdioServerParameters
+
+from session_manager import ServerConnection, SessionManager
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stdio_toy_server.py")
+
+
+@pytest.fixture
+async def manager():
+    params = StdioServerParameters(command=sys.executable, args=[SERVER], env=dict(os.environ))
+    manager = SessionManager([
+        ServerConnection("a", params, tools=["ping", "die"], startup_timeout=20),
+        ServerConnection("b", params, startup_timeout=20),
+    ])
+    await manager.connect_all()
+    yield manager
+    await manager.close()
+
+
+async def ping(manager: SessionManager, server: str = "a") -> int:
+    result = await asyncio.wait_for(manager.call_tool(f"{server}__ping", {}), 30)
+    return int(result.content[0].text)
+
+
+@pytest.mark.anyio
+async def test_tools_are_namespaced_and_filtered_by_the_allowlist(manager):
+    names = {tool.name for tool in await manager.list_tools()}
+    assert names == {"a__ping", "a__die", "b__ping", "b__other", "b__die"}
+
+
+@pytest.mark.anyio
+async def test_tool_outside_the_allowlist_is_rejected(manager):
+    with pytest.raises(ValueError, match="Unknown tool: a__other"):
+        await manager.call_tool("a__other", {})
+    with pytest.raises(ValueError, match="Unknown tool"):
+        await manager.call_tool("c__ping", {})
+    assert (await manager.call_tool("b__other", {})).content[0].text == "other"
+
+
+@pytest.mark.anyio
+async def test_server_killed_between_calls_is_respawned(manager):
+    pid = await ping(manager)
+    os.kill(pid, signal.SIGTERM)
+    new_pid = await ping(manager)
+    assert new_pid != pid
+    # The other server is untouched
+    assert await ping(manager, "b")
+
+
+@pytest.mark.anyio
+async def test_server_dying_mid_call_fails_the_call_instead_of_hanging(manager):
+    pid = await ping(manager)
+    # The retry on the respawned server dies too, so the error reaches the caller
+    with pytest.raises(ConnectionError):
+        await asyncio.wait_for(manager.call_tool("a__die", {}), 30)
+    assert await ping(manager) != pid
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight, request_key
+
+
+def test_request_key_normalizes_query_order_host_case_and_body():
+    assert request_key("get", "https://API.example.com/a?b=2&a=1") == request_key("GET", "https://api.example.com/a?a=1&b=2")
+    assert request_key("GET", "https://x/a", params={"q": 1}) == request_key("GET", "https://x/a?q=1")
+    assert request_key("POST", "https://x/a", body={"b": 1, "a": 2}) == request_key("POST", "https://x/a", body={"a": 2, "b": 1})
+    assert request_key("POST", "https://x/a", body={"a": 1}) != request_key("POST", "https://x/a", body={"a": 2})
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_share_one_flight():
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"ok": True}
+
+    waiters = [asyncio.create_task(flight.do("k", fetch)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats == {"calls": 1, "shared": 4}
+
+
+@pytest.mark.anyio
+async def test_finished_flight_is_not_reused():
+    flight = SingleFlight()
+    results = iter([1, 2])
+
+    async def fetch():
+        return next(results)
+
+    assert await flight.do("k", fetch) == 1
+    assert await flight.do("k", fetch) == 2
+    assert flight.stats == {"calls": 2, "shared": 0}
+
+
+@pytest.mark.anyio
+async def test_error_reaches_every_waiter():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        raise RuntimeError("upstream down")
+
+    waiters = [asyncio.create_task(flight.do("k", fetch)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert [str(result) for result in results] == ["upstream down"] * 3
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_does_not_cancel_the_flight():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(flight.do("k", fetch))
+    second = asyncio.create_task(flight.do("k", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    assert await second == "done"
+    assert first.cancelled()
@@ -0,0 +1,143 @@
+import operator
+from typing import Annotated
+
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Send
+from typing_extensions import TypedDict
+
+from sqlite_checkpointer import SQLiteCheckpointer
+
+
+class State(TypedDict):
+    topic: str
+    items: Annotated[list[str], operator.add]
+
+
+class Work(TypedDict):
+    item: str
+
+
+def build_graph(checkpointer, interrupt_before=None):
+    """plan fans out one `work` task per item with Send, then `summarize` runs once."""
+    graph = StateGraph(State)
+    graph.add_node("plan", lambda state: {"items": [f"plan:{state['topic']}"]})
+    graph.add_node("work", lambda task: {"items": [f"work:{task['item']}"]})
+    graph.add_node("summarize", lambda state: {"items": [f"summary:{len(state['items'])}"]})
+    graph.add_edge(START, "plan")
+    graph.add_conditional_edges("plan", lambda state: [Send("work", {"item": f"{state['topic']}-{i}"}) for i in range(3)])
+    graph.add_edge("work", "summarize")
+    graph.add_edge("summarize", END)
+    return graph.compile(checkpointer=checkpointer, interrupt_before=interrupt_before)
+
+
+def config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def run_turns(checkpointer, thread_id: str, topics: list[str]) -> dict:
+    graph = build_graph(checkpointer)
+    for topic in topics:
+        graph.invoke({"topic": topic}, config(thread_id))
+    return graph.get_state(config(thread_id)).values
+
+
+def history(checkpointer, thread_id: str) -> list[tuple]:
+    graph = build_graph(checkpointer)
+    return [(snapshot.values, snapshot.next) for snapshot in graph.get_state_history(config(thread_id))]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "checkpoints.db")
+
+
+def test_matches_memory_saver(db_path):
+    memory = MemorySaver()
+    with SQLiteCheckpointer(db_path, keep=None) as sqlite:
+        expected = run_turns(memory, "t", ["a", "b"])
+        assert run_turns(sqlite, "t", ["a", "b"]) == expected
+        # summarize ran once per turn, after all three Send tasks
+        assert [item for item in expected["items"] if item.startswith("summary")] == ["summary:4", "summary:9"]
+        assert history(sqlite, "t") == history(memory, "t")
+
+
+def test_send_fan_out_resumes_from_disk_after_reopen(db_path):
+    memory = MemorySaver()
+    paused = build_graph(memory, interrupt_before=["work"])
+    paused.invoke({"topic": "a"}, config("t"))
+    expected = paused.invoke(None, config("t"))
+
+    with SQLiteCheckpointer(db_path) as sqlite:
+        paused = build_graph(sqlite, interrupt_before=["work"])
+        paused.invoke({"topic": "a"}, config("t"))
+        assert [task.name for task in paused.get_state(config("t")).tasks] == ["work"] * 3
+
+    # The pending Send tasks survive the restart
+    with SQLiteCheckpointer(db_path) as sqlite:
+        resumed = build_graph(sqlite, interrupt_before=["work"])
+        assert resumed.invoke(None, config("t")) == expected
+
+
+def test_state_survives_close_and_reopen(db_path):
+    with SQLiteCheckpointer(db_path) as sqlite:
+        before = run_turns(sqlite, "t", ["a"])
+    with SQLiteCheckpointer(db_path) as sqlite:
+        assert build_graph(sqlite).get_state(config("t")).values == before
+        after = run_turns(sqlite, "t", ["b"])
+    assert after == run_turns(MemorySaver(), "t", ["a", "b"])
+
+
+def test_evicted_thread_is_reloaded_from_disk(db_path):
+    with SQLiteCheckpointer(db_path, max_threads=1) as sqlite:
+        first = run_turns(sqlite, "one", ["a"])
+        run_turns(sqlite, "two", ["b"])
+        assert [key[0] for key in sqlite._latest] == ["two"]
+
+        assert build_graph(sqlite).get_state(config("one")).values == first
+        assert [key[0] for key in sqlite._latest] == ["one"]
+        assert run_turns(sqlite, "one", ["c"]) == run_turns(MemorySaver(), "one", ["a", "c"])
+
+
+def test_keep_prunes_older_checkpoints(db_path):
+    with SQLiteCheckpointer(db_path, keep=2) as sqlite:
+        values = run_turns(sqlite, "t", ["a", "b", "c"])
+        sqlite.flush()
+        assert len(list(sqlite.list(config("t")))) == 2
+        count = sqlite._db.execute("SELECT COUNT(*) FROM checkpoints WHERE thread_id = 't'").fetchone()[0]
+        assert count == 2
+        # Writes of pruned checkpoints go with them
+        orphans = sqlite._db.execute(
+            "SELECT COUNT(*) FROM writes WHERE checkpoint_id NOT IN (SELECT checkpoint_id FROM checkpoints)"
+        ).fetchone()[0]
+        assert orphans == 0
+        assert build_graph(sqlite).get_state(config("t")).values == values
+
+
+def test_compact_keeps_the_latest_checkpoint_readable(db_path):
+    with SQLiteCheckpointer(db_path, keep=None) as sqlite:
+        values = run_turns(sqlite, "t", ["a", "b"])
+        total = len(list(sqlite.list(config("t"))))
+
+    with SQLiteCheckpointer(db_path, keep=None) as sqlite:
+        removed, idle = sqlite.compact(keep=1)
+        assert (removed, idle) == (total - 1, 0)
+        assert len(list(sqlite.list(config("t")))) == 1
+        assert build_graph(sqlite).get_state(config("t")).values == values
+        assert run_turns(sqlite, "t", ["c"]) == run_turns(MemorySaver(), "t", ["a", "b", "c"])
+
+
+def test_compact_drops_idle_threads(db_path):
+    with SQLiteCheckpointer(db_path) as sqlite:
+        run_turns(sqlite, "t", ["a"])
+        sqlite.flush()
+        sqlite._db.execute("UPDATE checkpoints SET updated_at = 0")
+        sqlite._db.commit()
+        sqlite._latest.clear()
+        run_turns(sqlite, "active", ["b"])
+
+        _, idle = sqlite.compact(max_idle=3600)
+        assert idle == 1
+        assert build_graph(sqlite).get_state(config("t")).values == {}
+        assert build_graph(sqlite).get_state(config("active")).values["topic"] == "b"
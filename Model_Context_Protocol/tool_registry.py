@@ -0,0 +1,77 @@
+import asyncio
+from typing import Any, Callable, Optional
+
+from mcp import ClientSession, types
+
+
+class ToolRegistry:
+    """Client-side cache of an MCP server's tool list.
+
+    The tool schemas are fetched once and kept together with their Bedrock `toolSpec` and
+    LangChain conversions. The cache is only dropped when the server sends a
+    `notifications/tools/list_changed`; pass `handle_message` as the session's
+    `message_handler` to wire that up. `version` increases every time the tools are reloaded;
+    `build` uses it to rebuild an object derived from the tools (e.g. an agent) only then.
+    """
+
+    def __init__(self, session: Optional[ClientSession] = None):
+        self.session = session
+        self.version = 0
+        self._tools: Optional[list[types.Tool]] = None
+        self._bedrock_specs: Optional[list[dict]] = None
+        self._langchain_tools: Optional[list] = None
+        self._built: Optional[tuple[int, Any]] = None
+        self._lock = asyncio.Lock()
+
+    async def handle_message(self, message) -> None:
+        """ClientSession message handler that invalidates the cache on tools/list_changed."""
+        if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ToolListChangedNotification):
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        self._tools = None
+        self._bedrock_specs = None
+        self._langchain_tools = None
+
+    async def tools(self) -> list[types.Tool]:
+        """Return the server's tools, listing them only if the cache is empty."""
+        if self._tools is None:
+            async with self._lock:
+                if self._tools is None:
+                    response = await self.session.list_tools()
+                    self._tools = response.tools
+                    self.version += 1
+        return self._tools
+
+    async def bedrock_specs(self) -> list[dict]:
+        """Tools converted to Bedrock Converse `toolSpec` entries."""
+        tools = await self.tools()
+        if self._bedrock_specs is None:
+            self._bedrock_specs = [{"toolSpec":
+                {
+                "name": tool.name,
+                "description": tool.description,
+                "inputSchema": {"json":tool.inputSchema}
+                }
+            } for tool in tools]
+        return self._bedrock_specs
+
+    async def langchain_tools(self) -> list:
+        """Tools wrapped as LangChain tools that call back into the MCP session."""
+        tools = await self.tools()
+        if self._langchain_tools is None:
+            # Imported here so the plain Bedrock client doesn't need LangChain installed
+            from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+            self._langchain_tools = [convert_mcp_tool_to_langchain_tool(self.session, tool) for tool in tools]
+        return self._langchain_tools
+
+    async def build(self, factory: Callable[[list], Any]) -> Any:
+        """`factory(langchain_tools)`, called again only once the tools have been reloaded.
+
+        Agent clients get their agent through this on every turn, so a tools/list_changed
+        from the server reaches the agent. One factory per registry.
+        """
+        tools = await self.langchain_tools()
+        if self._built is None or self._built[0] != self.version:
+            self._built = (self.version, factory(tools))
+        return self._built[1]
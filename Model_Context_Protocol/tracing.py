@@ -0,0 +1,41 @@
+import json
+import uuid
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from mcp import ClientSession, types
+from mcp.shared.exceptions import McpError
+from pydantic import AnyUrl
+
+# Key of the trace ID in a request's `_meta`
+TRACE_META_KEY = "traceId"
+
+# Trace ID of the tool call being handled (server side)
+current_trace: ContextVar[Optional[str]] = ContextVar("current_trace", default=None)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+async def call_tool_traced(session: ClientSession, name: str, arguments: dict[str, Any],
+                           trace_id: Optional[str] = None) -> types.CallToolResult:
+    """`session.call_tool` that sends `trace_id` in the request's `_meta`, so the server can
+    attribute its tool and upstream timings to it."""
+    if trace_id is None:
+        return await session.call_tool(name, arguments)
+    params = types.CallToolRequestParams(name=name, arguments=arguments, _meta={TRACE_META_KEY: trace_id})
+    return await session.send_request(
+        types.ClientRequest(types.CallToolRequest(method="tools/call", params=params)),
+        types.CallToolResult,
+    )
+
+
+async def read_trace(session: ClientSession, trace_id: str) -> Optional[dict]:
+    """The server's recorded spans for a trace (`traces://{trace_id}`), or None if it doesn't record traces."""
+    try:
+        result = await session.read_resource(AnyUrl(f"traces://{trace_id}"))
+    except McpError:
+        return None
+    contents = result.contents[0] if result.contents else None
+    return json.loads(contents.text) if contents is not None and hasattr(contents, "text") else None